@@ -7,7 +7,7 @@
 
 # submodules
 from .__about__ import __version__  # noqa: F401
-from .isogeo2docx import Isogeo2docx  # noqa: F401
+from .isogeo2docx import CONTEXT_VARIABLES, Isogeo2docx, get_exporter  # noqa: F401
 
 # subpackages
 from .utils import *  # noqa: F401 F403
@@ -0,0 +1,238 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Command line interface.
+
+    python -m isogeotodocx precompile tests/fixtures/template_Isogeo.docx
+    isogeo2docx export --input search.json --template t.docx --out _output -w 4
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import argparse
+import logging
+import sqlite3
+import sys
+from pathlib import Path
+
+# submodules
+from isogeotodocx import (
+    ExportManifest,
+    Isogeo2docx,
+    RenderCache,
+    iter_search_results,
+)
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# checkpoint of the export command, stored into the output folder by default
+_checkpoint_name = ".isogeo2docx_checkpoint.sqlite"
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def cmd_precompile(args: argparse.Namespace) -> int:
+    """Precompile templates and check their variables."""
+    to_docx = Isogeo2docx()
+    for template_path in args.templates:
+        try:
+            artifact_path = to_docx.precompile_template(
+                template_path, strict=args.strict
+            )
+        except (OSError, ValueError) as e:
+            logger.error(e)
+            return 1
+        print(artifact_path)
+    return 0
+
+
+def cmd_export(args: argparse.Namespace) -> int:
+    """Export a search dump into Word documents, checkpointing progress: documents
+    already exported by a previous (even interrupted) run are skipped."""
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    checkpoint = Path(args.checkpoint or out_dir / _checkpoint_name)
+    if args.restart and checkpoint.is_file():
+        checkpoint.unlink()
+
+    to_docx = Isogeo2docx(
+        lang=args.lang,
+        max_fields=args.max_fields,
+        embed_fonts=not args.no_embed_fonts,
+        max_image_width=args.max_image_width,
+        render_cache=RenderCache(
+            args.render_cache,
+            ignore_variables=("varMdDtExp",) + tuple(args.render_cache_ignore or ()),
+        )
+        if args.render_cache
+        else None,
+        use_artifacts=args.use_artifacts,
+    )
+    counts = {"done": 0, "skipped": 0, "error": 0}
+    try:
+        manifest = ExportManifest(checkpoint, commit_every=args.checkpoint_every)
+        with to_docx, manifest:
+            if len(manifest):
+                logger.info(
+                    "Resuming from checkpoint: {} ({} documents)".format(
+                        checkpoint, len(manifest)
+                    )
+                )
+            for status in to_docx.export_many(
+                template_path=args.template,
+                metadatas=iter_search_results(args.input),
+                out_dir=out_dir,
+                workers=args.workers,
+                manifest=manifest,
+            ):
+                state = status.get("status")
+                counts[state] = counts.get(state, 0) + 1
+                if state == "error":
+                    logger.error(
+                        "Export of {} failed: {}".format(
+                            status.get("_id"), status.get("error")
+                        )
+                    )
+                total = sum(counts.values())
+                if total % args.log_every == 0:
+                    logger.info("{} metadatas processed: {}".format(total, counts))
+    except KeyboardInterrupt:
+        logger.warning(
+            "Export interrupted: run the same command again to resume. {}".format(
+                counts
+            )
+        )
+        return 130
+    except sqlite3.Error as e:
+        logger.error(
+            "Checkpoint can't be used: {}. {}. Fix it or start over with --restart. "
+            "{}".format(checkpoint, e, counts)
+        )
+        return 1
+    except (OSError, ValueError) as e:
+        logger.error("Export failed: {}. Run again to resume. {}".format(e, counts))
+        return 1
+
+    logger.info("Export finished: {}".format(counts))
+    return 1 if counts.get("error") else 0
+
+
+def main(argv: list = None) -> int:
+    """Command line entry point.
+
+    :param list argv: arguments. Defaults to the command line ones.
+
+    :returns: exit code
+    :rtype: int
+    """
+    parser = argparse.ArgumentParser(
+        prog="isogeo2docx", description="Export Isogeo metadatas to Word documents."
+    )
+    parser.add_argument("-v", "--verbose", action="store_true", help="debug logs")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.required = True
+
+    # precompile
+    parser_precompile = subparsers.add_parser(
+        "precompile",
+        help="check templates variables and store their compiled version next to "
+        "them, loaded by export --use-artifacts",
+    )
+    parser_precompile.add_argument("templates", nargs="+", help="Word templates")
+    parser_precompile.add_argument(
+        "--strict", action="store_true", help="fail if a variable is unknown"
+    )
+    parser_precompile.set_defaults(func=cmd_precompile)
+
+    # export
+    parser_export = subparsers.add_parser(
+        "export",
+        help="export a search dump into Word documents, resuming interrupted runs",
+    )
+    parser_export.add_argument(
+        "-i", "--input", required=True, help="search dump (.json, .jsonl, .gz)"
+    )
+    parser_export.add_argument("-t", "--template", required=True, help="Word template")
+    parser_export.add_argument("-o", "--out", required=True, help="output folder")
+    parser_export.add_argument(
+        "-w", "--workers", type=int, help="worker processes. Defaults to CPU count."
+    )
+    parser_export.add_argument(
+        "-l", "--lang", default="FR", choices=("FR", "EN"), help="output language"
+    )
+    parser_export.add_argument(
+        "--max-fields", type=int, help="maximum number of feature attributes listed"
+    )
+    parser_export.add_argument(
+        "--no-embed-fonts",
+        action="store_true",
+        help="drop the fonts embedded into the template: much smaller documents",
+    )
+    parser_export.add_argument(
+        "--max-image-width", type=int, help="downsize larger template images"
+    )
+    parser_export.add_argument(
+        "--render-cache",
+        help="folder of documents rendered by previous runs, reused for identical "
+        "metadatas (except the export date). Links and dates of each metadata are "
+        "part of the key: only re-exports of the same metadata hit it, see "
+        "--render-cache-ignore.",
+    )
+    parser_export.add_argument(
+        "--render-cache-ignore",
+        nargs="+",
+        metavar="VARIABLE",
+        help="other variables left out of the render cache key, e.g. {}: "
+        "metadatas with the same content then share documents, with the links and "
+        "dates of the first one".format(" ".join(RenderCache.RECORD_VARIABLES)),
+    )
+    parser_export.add_argument(
+        "--use-artifacts",
+        action="store_true",
+        help="load the template artifact made by precompile. It contains code: only "
+        "if the template folder is not writable by untrusted users.",
+    )
+    parser_export.add_argument(
+        "--checkpoint",
+        help="checkpoint database. Defaults to {} in the output folder.".format(
+            _checkpoint_name
+        ),
+    )
+    parser_export.add_argument(
+        "--checkpoint-every",
+        type=int,
+        default=20,
+        help="documents exported between two checkpoint writes",
+    )
+    parser_export.add_argument(
+        "--restart", action="store_true", help="ignore the checkpoint, export all"
+    )
+    parser_export.add_argument(
+        "--log-every", type=int, default=500, help="progress log frequency"
+    )
+    parser_export.set_defaults(func=cmd_export)
+
+    args = parser.parse_args(argv)
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s || %(levelname)s || %(message)s",
+    )
+    return args.func(args)
+
+
+# ##############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,23 +11,136 @@
 # ##################################
 
 # Standard library
+import asyncio
+import hashlib
+import json
 import logging
+import pickle
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    as_completed,
+    wait,
+)
+from contextlib import ExitStack
 from datetime import datetime
+from functools import partial
+from io import BytesIO
+from os import cpu_count
 from pathlib import Path
+from threading import Lock
+from uuid import uuid4
+from weakref import WeakKeyDictionary
 
 # 3rd party library
-from docxtpl import DocxTemplate, InlineImage, etree
-from isogeo_pysdk import Event, IsogeoTranslator, IsogeoUtils, Metadata, Share
+from docxtpl import DocxTemplate, etree
+from isogeo_pysdk import Event, Metadata, Share
 
 # custom submodules
-from isogeotodocx.utils import Formatter
+from isogeotodocx.__about__ import __version__
+from isogeotodocx.utils import (
+    ArchiveWriter,
+    CachedDocxTemplate,
+    CatalogWriter,
+    DateFormatter,
+    ExportManifest,
+    ExportMetrics,
+    Formatter,
+    RenderCache,
+    TemplateCache,
+    ThumbnailCache,
+    get_translation_table,
+    hash_file,
+    precompile_template,
+    save_docx,
+)
 
 # ##############################################################################
 # ############ Globals ############
 # #################################
 
 logger = logging.getLogger("isogeo2office")
-utils = IsogeoUtils()
+
+# variables filled by Isogeo2docx.build_context
+CONTEXT_VARIABLES = (
+    # identification
+    "varType",
+    "varTitle",
+    "varAbstract",
+    "varNameTech",
+    "varOwner",
+    "varPath",
+    "varKeywords",
+    "varKeywordsCount",
+    "varInspireTheme",
+    "varThumbnail",
+    # quality
+    "varTopologyInfo",
+    "varInspireConformity",
+    "varSpecifications",
+    # history
+    "varCollectContext",
+    "varCollectMethod",
+    "varValidityComment",
+    "varDataDtCrea",
+    "varDataDtUpda",
+    "varDataDtPubl",
+    "varValidityStart",
+    "varValidityEnd",
+    "varEventsCount",
+    "varEvents",
+    # geography
+    "varEncoding",
+    "varScale",
+    "varGeometry",
+    "varObjectsCount",
+    "varSRS",
+    "varFormat",
+    "varFieldsCount",
+    "varFields",
+    # resource
+    "varContactsCount",
+    "varContactsDetails",
+    "varConditions",
+    "varLimitations",
+    # metadata
+    "varMdDtCrea",
+    "varMdDtUpda",
+    "varMdDtExp",
+    "varViewOC",
+    "varEditAPP",
+)
+_all_variables = frozenset(CONTEXT_VARIABLES)
+_contacts_variables = ("varContactsCount", "varContactsDetails")
+_events_variables = ("varEventsCount", "varEvents")
+_fields_variables = ("varFieldsCount", "varFields")
+
+# exporter of the current worker process and its parameters key, set by its first
+# export (see _get_worker_exporter)
+_worker_exporter = None
+_worker_exporter_key = None
+
+# exporters shared by the process, see get_exporter
+_shared_exporters = {}
+_shared_exporters_lock = Lock()
+
+
+# stage timer used when instrumentation is disabled
+class _NoStage(object):
+    """Stage timer used when instrumentation is disabled: does nothing.
+    (`contextlib.nullcontext` requires Python 3.7)"""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        return None
+
+
+_no_stage = _NoStage()
 
 # ##############################################################################
 # ########## Classes ###############
@@ -39,8 +152,38 @@ class Isogeo2docx(object):
 
     :param str lang: selected language for output
     :param dict thumbnails: dictionary of metadatas associated to an image path
+    :param int thumbnails_max_width: maximum width (pixels) of thumbnails. Larger ones \
+    are downsized once before being inserted. Requires Pillow.
+    :param int thumbnails_dpi: resolution of inserted thumbnails. Requires Pillow.
     :param str url_base_edit: base url to format edit links (basically app.isogeo.com)
     :param str url_base_view: base url to format view links (basically open.isogeo.com)
+    :param ExportMetrics metrics: if set, export stages are timed and profiled
+    :param DateFormatter date_formatter: dates formatter. Defaults to the one shared \
+    by the process.
+    :param int async_workers: maximum number of documents rendered at once by \
+    `export_async`. Defaults to CPU count.
+    :param int max_fields: maximum number of feature attributes listed by document. \
+    `varFieldsCount` remains the total count. Defaults to all.
+    :param bool embed_fonts: keep the fonts embedded into the template. Without \
+    them, documents are much smaller and use the fonts installed where they are \
+    opened.
+    :param int max_image_width: maximum width (pixels) of the template images. \
+    Larger ones are downsized once. Requires Pillow.
+    :param RenderCache render_cache: if set, `export` takes documents already \
+    rendered from identical contexts from this cache instead of rendering them. \
+    See its `ignore_variables` to share documents between metadatas.
+    :param dict shares_index: OpenCatalog URL prefix by metadata UUID, used for \
+    metadatas exported without share by default. See `index_shares`.
+    :param bool use_artifacts: load the precompiled artifacts of templates (see \
+    `precompile_template`). They contain code run at rendering: only enable it if \
+    the templates folder can not be written by untrusted users.
+
+    Thread-safety: an exporter is not modified by exports, and its caches (templates,
+    thumbnails, dates) are guarded. `md2docx`, `build_context`, `render_context`,
+    `export` and `catalog2docx` can be called concurrently from several threads, each
+    one on its own template (`get_template`). Exporters with different parameters do
+    not share any state. Only instrumentation (`metrics`) must not be shared between
+    threads.
     """
 
     def __init__(
@@ -49,11 +192,32 @@ class Isogeo2docx(object):
         thumbnails: dict = None,
         url_base_edit: str = "https://app.isogeo.com",
         url_base_view: str = "https://open.isogeo.com",
+        thumbnails_max_width: int = None,
+        thumbnails_dpi: int = None,
+        metrics: ExportMetrics = None,
+        date_formatter: DateFormatter = None,
+        async_workers: int = None,
+        max_fields: int = None,
+        embed_fonts: bool = True,
+        max_image_width: int = None,
+        render_cache: RenderCache = None,
+        shares_index: dict = None,
+        use_artifacts: bool = False,
     ):
         """Processing matching between Isogeo metadata and a Miscrosoft Word template."""
         super(Isogeo2docx, self).__init__()
 
         # ------------ VARIABLES ---------------------
+        # store params to instanciate the same exporter into worker processes
+        self.lang = lang
+        self.url_base_edit = url_base_edit
+        self.url_base_view = url_base_view
+        self.max_fields = max_fields
+        self.embed_fonts = embed_fonts
+        self.max_image_width = max_image_width
+        self.render_cache = render_cache
+        self.use_artifacts = use_artifacts
+
         # LOCALE
         if lang.lower() == "fr":
             self.dates_fmt = "%d/%m/%Y"
@@ -65,28 +229,236 @@ class Isogeo2docx(object):
             self.locale_fmt = "uk_UK"
 
         # TRANSLATIONS
-        self.isogeo_tr = IsogeoTranslator(lang).tr
+        self.isogeo_tr = get_translation_table(lang).tr
 
         # FORMATTER
-        self.fmt = Formatter()
+        self.fmt = Formatter(lang=lang, date_formatter=date_formatter)
+        self.date_formatter = self.fmt.date_formatter
 
-        # THUMBNAILS
+        # THUMBNAILS - paths checked and resolved once
+        self.thumbnails = {}
         if thumbnails is not None and isinstance(thumbnails, dict):
-            self.thumbnails = thumbnails
+            for md_id, img_path in thumbnails.items():
+                if img_path and Path(img_path).is_file():
+                    self.thumbnails[md_id] = str(Path(img_path).resolve())
+                else:
+                    logger.warning(
+                        "Thumbnail not found for {}: {}".format(md_id, img_path)
+                    )
         else:
-            self.thumbnails = {}
             logger.debug("No valid thumbnails matching table passed.")
 
-        # URLS
-        utils.app_url = url_base_edit  # APP
-        utils.oc_url = url_base_view  # OpenCatalog url
+        # processed images, shared by all documents
+        self.thumbnails_max_width = thumbnails_max_width
+        self.thumbnails_dpi = thumbnails_dpi
+        self.thumbnails_cache = ThumbnailCache(
+            max_width=thumbnails_max_width, dpi=thumbnails_dpi
+        )
+
+        # URLS - formatted once, by instance, then by share
+        self.view_url_template = "{}/s/{{share_id}}/{{share_token}}/r/{{md_id}}".format(
+            url_base_view.rstrip("/")
+        )
+        self._view_url_prefixes = {}
+        self.shares_index = dict(shares_index or {})
+
+        # TEMPLATES - parsed once, by resolved path
+        self.templates = {}
+        self._templates_lock = Lock()
+
+        # INSTRUMENTATION - functions are wrapped only if enabled
+        self.metrics = metrics
+        if metrics is not None:
+            self.fmt.clean_xml = metrics.timed("clean_xml", self.fmt.clean_xml)
+            self._format_datetime = metrics.timed("dates", self._format_datetime)
+
+        # ASYNC - executor created at first use, semaphores by event loop
+        self.async_workers = async_workers or cpu_count() or 1
+        self._async_executor = None
+        self._async_semaphores = WeakKeyDictionary()
+        self._async_lock = Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """Shut down the thread pool of asynchronous exports, waiting for running
+        ones. The exporter remains usable: a new pool is created by the next
+        asynchronous export."""
+        with self._async_lock:
+            executor, self._async_executor = self._async_executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+            logger.debug("Asynchronous exports thread pool shut down.")
+
+    def _stage(self, name: str):
+        """Returns a context manager timing an export stage, if instrumentation is
+        enabled.
+
+        :param str name: stage name
+        """
+        if self.metrics is None:
+            return _no_stage
+        return self.metrics.stage(name)
+
+    def get_view_url_prefix(self, share: Share) -> str:
+        """Returns the URL of the OpenCatalog of a share, to which metadata UUIDs are
+        appended. Formatted once by share.
+
+        :param Share share: share
+        """
+        key = (share._id, share.urlToken)
+        prefix = self._view_url_prefixes.get(key)
+        if prefix is None:
+            prefix = self.view_url_template.format(
+                md_id="", share_id=share._id, share_token=share.urlToken
+            )
+            self._view_url_prefixes[key] = prefix
+        return prefix
+
+    def get_view_url(self, md_id: str, share: Share) -> str:
+        """Returns the URL of a metadata on the OpenCatalog of a share.
+
+        :param str md_id: metadata UUID
+        :param Share share: share in which the metadata is
+        """
+        return self.get_view_url_prefix(share) + md_id
+
+    def index_shares(self, shares) -> dict:
+        """Index the OpenCatalog URLs of shares by metadata, so that metadatas
+        exported without share (`export_many`, `catalog2docx`...) still link to their
+        OpenCatalog. A metadata in several shares links to the first one.
+
+        The exporter is left as is (it may be shared, see `get_exporter`): pass the
+        index to the exports (`shares_index`) or to a new exporter.
+
+        :param shares: iterable of (Share, metadatas) pairs, metadatas being \
+        Metadata, raw API dictionaries or UUIDs. A dictionary works too.
+
+        :returns: OpenCatalog URL prefix by metadata UUID
+        :rtype: dict
+
+        :Example:
+
+        .. code-block:: python
+
+            shares_index = to_docx.index_shares(
+                (share, isogeo.search(share=share._id).results) for share in shares
+            )
+            to_docx.export_many(
+                template_path, metadatas, out_dir, shares_index=shares_index
+            )
+        """
+        if isinstance(shares, dict):
+            shares = shares.items()
+
+        shares_index = {}
+        for share, metadatas in shares:
+            prefix = self.get_view_url_prefix(share)
+            for md in metadatas:
+                if isinstance(md, Metadata):
+                    md_id = md._id
+                elif isinstance(md, dict):
+                    md_id = md.get("_id")
+                else:
+                    md_id = md
+                shares_index.setdefault(md_id, prefix)
+
+        logger.debug("{} metadatas indexed with their share.".format(len(shares_index)))
+        return shares_index
+
+    def get_edit_url(self, md: Metadata, tab: str = "identification") -> str:
+        """Returns the URL of a metadata on the edition application (APP).
+
+        :param Metadata md: metadata
+        :param str tab: target tab in the web form
+
+        :returns: URL or None if the metadata creator is unknown
+        :rtype: str
+        """
+        edit_url = md.admin_url(self.url_base_edit.rstrip("/"))
+        if not edit_url:
+            return None
+        return edit_url + tab
+
+    def _format_datetime(self, in_date: str, fmt: str) -> str:
+        """Format a date returned by the API.
+
+        :param str in_date: date or datetime as returned by the API
+        :param str fmt: strftime format
+        """
+        return self.date_formatter.format(in_date, fmt)
+
+    def get_template(self, template_path: Path) -> DocxTemplate:
+        """Returns a fresh template to fill. The .docx is parsed and its Jinja source
+        compiled only at first call (or when the file changes), next calls only copy the
+        parsed document.
+
+        :param Path template_path: path to the Word template
+
+        :rtype: DocxTemplate
+        """
+        return self.get_template_cache(template_path).new_template()
+
+    def precompile_template(self, template_path: Path, strict: bool = False) -> Path:
+        """Check that the template only uses variables filled by the exporter and
+        store its patched and compiled version next to it, loaded by exporters with
+        `use_artifacts`. See `precompile_template`.
+
+        :param Path template_path: path to the Word template
+        :param bool strict: raise ValueError if the template uses unknown variables
+
+        :returns: path to the artifact
+        :rtype: Path
+        """
+        return precompile_template(
+            template_path, known_variables=CONTEXT_VARIABLES, strict=strict
+        )
+
+    def get_template_cache(self, template_path: Path) -> TemplateCache:
+        """Returns the parsed template, parsing it only at first call or when the file
+        changes.
+
+        :param Path template_path: path to the Word template
 
-    def md2docx(self, docx_template: DocxTemplate, md: Metadata, share: Share = None):
+        :rtype: TemplateCache
+        """
+        key = str(Path(template_path).resolve())
+        cache = self.templates.get(key)
+        if cache is None or cache.is_stale():
+            with self._templates_lock:
+                # another thread may have parsed it meanwhile
+                cache = self.templates.get(key)
+                if cache is None or cache.is_stale():
+                    cache = TemplateCache(
+                        key,
+                        use_artifact=self.use_artifacts,
+                        embed_fonts=self.embed_fonts,
+                        max_image_width=self.max_image_width,
+                    )
+                    self.templates[key] = cache
+
+        return cache
+
+    def md2docx(
+        self,
+        docx_template: DocxTemplate,
+        md: Metadata,
+        share: Share = None,
+        export_date: str = None,
+    ):
         """Dump Isogeo metadata into a docx template.
 
         :param DocxTemplate docx_template: Word template to fill
         :param Metadata metadata: metadata to dumpinto the template
         :param Share share: share in which the metadata is. Used to build the view URL.
+        :param str export_date: formatted export date. Defaults to now.
+
+        :returns: True if the template has been filled, False if rendering failed
+        :rtype: bool
         """
         logger.debug(
             "Starting the export into Word .docx of {} ({})".format(
@@ -94,6 +466,180 @@ class Isogeo2docx(object):
             )
         )
 
+        # only build the sections used by the template
+        variables = None
+        if isinstance(docx_template, CachedDocxTemplate):
+            variables = docx_template.source.variables()
+
+        with self._stage("context"):
+            context = self.build_context(md, share, export_date, variables)
+
+        # fillfull file
+        if self.render_context(docx_template, context):
+            logger.info(
+                "Vector metadata stored: {} ({})".format(
+                    md.title_or_name(slugged=1), md._id
+                )
+            )
+            return True
+
+        # end of function
+        return False
+
+    def md2bytes(
+        self,
+        template_path: Path,
+        md: Metadata,
+        out_docx=None,
+        share: Share = None,
+        export_date: str = None,
+        compress: bool = True,
+    ) -> bytes:
+        """Fill a copy of the template with a metadata and returns the document, or
+        write it into a stream, without any temporary file.
+
+        :param Path template_path: path to the Word template
+        :param Metadata md: metadata to export. Raw API dictionaries are accepted.
+        :param out_docx: writable binary file object (or path) to write the document \
+        into. If not set, the document is returned.
+        :param Share share: share in which the metadata is. Used to build the view URL.
+        :param str export_date: formatted export date. Defaults to now.
+        :param bool compress: compress the document. Without compression, saving is \
+        much faster but the document is bigger.
+
+        :raises ValueError: if rendering failed
+
+        :returns: Word document, if `out_docx` is not set
+        :rtype: bytes
+
+        :Example:
+
+        .. code-block:: python
+
+            docx = to_docx.md2bytes(template_path, md, compress=False)
+            # or
+            to_docx.md2bytes(template_path, md, out_docx=response_stream)
+        """
+        if isinstance(md, dict):
+            md = Metadata.clean_attributes(md)
+
+        tpl = self.get_template(template_path)
+        if not self.md2docx(
+            docx_template=tpl, md=md, share=share, export_date=export_date
+        ):
+            raise ValueError(
+                "Rendering of {} failed. See logs for details.".format(md._id)
+            )
+
+        with self._stage("save"):
+            if out_docx is not None:
+                save_docx(tpl, out_docx, compress=compress)
+                return None
+
+            out_docx = BytesIO()
+            save_docx(tpl, out_docx, compress=compress)
+            return out_docx.getvalue()
+
+    def render_context(self, docx_template: DocxTemplate, context: dict) -> bool:
+        """Render a context, as returned by `build_context`, into a docx template.
+
+        The context is not modified, so it can be rendered into many templates.
+
+        :param DocxTemplate docx_template: Word template to fill
+        :param dict context: template context of a metadata
+
+        :returns: True if the template has been filled, False if rendering failed
+        :rtype: bool
+        """
+        try:
+            with self._stage("thumbnail"):
+                context = self.bind_context(docx_template, context)
+            with self._stage("render"):
+                docx_template.render(context, autoescape=True)
+            return True
+        except etree.XMLSyntaxError as e:
+            logger.error(
+                "Invalid character in XML: {}. "
+                "Any special character (<, <, &...)? Check: {}".format(
+                    e, context.get("varEditAPP")
+                )
+            )
+        except (UnicodeEncodeError, UnicodeDecodeError) as e:
+            logger.error(
+                "Encoding error: {}. "
+                "Any special character (<, <, &...)? Check: {}".format(
+                    e, context.get("varEditAPP")
+                )
+            )
+        except Exception as e:
+            logger.error(
+                "Unexpected error: {}. Check: {}".format(e, context.get("varEditAPP"))
+            )
+
+        return False
+
+    def bind_context(self, docx_template: DocxTemplate, context: dict) -> dict:
+        """Returns a copy of the context with images bound to the template: the \
+        thumbnail path is replaced by an image inserted into the document.
+
+        :param DocxTemplate docx_template: template the context will be rendered into
+        :param dict context: template context of a metadata
+
+        :rtype: dict
+        """
+        thumbnail = context.get("varThumbnail")
+        if not isinstance(thumbnail, str):
+            return context
+
+        context = dict(context)
+        try:
+            context["varThumbnail"] = self.thumbnails_cache.inline_image(
+                docx_template, thumbnail
+            )
+        except OSError as e:
+            del context["varThumbnail"]
+            logger.error(
+                "Thumbnail of {} can't be read: {}".format(context.get("varTitle"), e)
+            )
+
+        return context
+
+    def now(self) -> str:
+        """Returns the current date, formatted as export date."""
+        return datetime.now().strftime(self.datetimes_fmt)
+
+    def build_context(
+        self,
+        md: Metadata,
+        share: Share = None,
+        export_date: str = None,
+        variables: frozenset = None,
+        shares_index: dict = None,
+    ) -> dict:
+        """Build the template context of a metadata, independently of any template.
+
+        The context only holds plain values (strings, numbers, lists and dictionaries):
+        it can be built in another process, serialized (JSON, pickle) and rendered
+        later into one or many templates with `render_context`. The thumbnail is \
+        stored as a path, replaced by the image when rendering.
+
+        :param Metadata md: metadata to dump into the template
+        :param Share share: share in which the metadata is. Used to build the view URL.
+        :param str export_date: formatted export date, computed once for a batch of \
+        metadatas (see `now`). Defaults to now.
+        :param frozenset variables: variables used by the template (see \
+        `TemplateCache.variables`). Sections the template does not use (contacts, \
+        attributes, events, specifications, conditions, limitations, thumbnail) are \
+        not built. Defaults to all sections.
+        :param dict shares_index: OpenCatalog URL prefix by metadata UUID, used \
+        without share (see `index_shares`). Defaults to the exporter one.
+
+        :rtype: dict
+        """
+        if variables is None:
+            variables = _all_variables
+        if shares_index is None:
+            shares_index = self.shares_index
         # template context starting with metadata attributes which do not require any special formatting
         context = {
             # IDENTIFICATION
@@ -115,13 +661,9 @@ class Isogeo2docx(object):
             "varGeometry": self.fmt.clean_xml(md.geometry),
             "varObjectsCount": self.fmt.clean_xml(md.features),
             # METADATA
-            "varMdDtCrea": utils.hlpr_datetimes(md._created).strftime(
-                self.datetimes_fmt
-            ),
-            "varMdDtUpda": utils.hlpr_datetimes(md._modified).strftime(
-                self.datetimes_fmt
-            ),
-            "varMdDtExp": datetime.now().strftime(self.datetimes_fmt),
+            "varMdDtCrea": self._format_datetime(md._created, self.datetimes_fmt),
+            "varMdDtUpda": self._format_datetime(md._modified, self.datetimes_fmt),
+            "varMdDtExp": export_date or self.now(),
         }
 
         # TAGS #
@@ -168,9 +710,9 @@ class Isogeo2docx(object):
 
         # formatting links to visualize on OpenCatalog and edit on APP
         if share is not None:
-            context["varViewOC"] = utils.get_view_url(
-                md_id=md._id, share_id=share._id, share_token=share.urlToken
-            )
+            context["varViewOC"] = self.get_view_url(md._id, share)
+        elif md._id in shares_index:
+            context["varViewOC"] = shares_index.get(md._id) + md._id
         else:
             logger.debug(
                 "No OpenCatalog URL for metadata: {} ({})".format(
@@ -179,11 +721,11 @@ class Isogeo2docx(object):
             )
 
         # link to APP
-        context["varEditAPP"] = utils.get_edit_url(md)
+        context["varEditAPP"] = self.get_edit_url(md)
 
         # ---- CONTACTS # ----------------------------------------------------
         contacts_out = []
-        if md.contacts:
+        if md.contacts and not variables.isdisjoint(_contacts_variables):
             # formatting contacts
             for ct_in in md.contacts:
                 ct = {}
@@ -208,26 +750,37 @@ class Isogeo2docx(object):
             context["varContactsDetails"] = contacts_out
 
         # ---- ATTRIBUTES --------------------------------------------------
-        fields_out = []
-        if md.type == "vectorDataset" and isinstance(md.featureAttributes, list):
-            for f_in in md.featureAttributes:
-                field = {}
-                # ensure other fields
-                field["name"] = self.fmt.clean_xml(f_in.get("name", ""))
-                field["alias"] = self.fmt.clean_xml(f_in.get("alias", ""))
-                field["description"] = self.fmt.clean_xml(f_in.get("description", ""))
-                field["dataType"] = f_in.get("dataType", "")
-                field["language"] = f_in.get("language", "")
-                # store into the final list
-                fields_out.append(field)
+        if (
+            md.type == "vectorDataset"
+            and isinstance(md.featureAttributes, list)
+            and not variables.isdisjoint(_fields_variables)
+        ):
+            fields_in = md.featureAttributes[: self.max_fields]
+            # cleaned by column, in batch
+            clean_xml_batch = self.fmt.clean_xml_batch
+            fields_out = [
+                {
+                    "name": name,
+                    "alias": alias,
+                    "description": description,
+                    "dataType": f_in.get("dataType", ""),
+                    "language": f_in.get("language", ""),
+                }
+                for f_in, name, alias, description in zip(
+                    fields_in,
+                    clean_xml_batch([f.get("name", "") for f in fields_in]),
+                    clean_xml_batch([f.get("alias", "") for f in fields_in]),
+                    clean_xml_batch([f.get("description", "") for f in fields_in]),
+                )
+            ]
 
             # add to the final context
-            context["varFieldsCount"] = len(fields_out)
+            context["varFieldsCount"] = len(md.featureAttributes)
             context["varFields"] = fields_out
 
         # ---- EVENTS ------------------------------------------------------
         events_out = []
-        if md.events:
+        if md.events and not variables.isdisjoint(_events_variables):
             for e in md.events:
                 evt = Event(**e)
                 # pop creation events (already in the export document)
@@ -236,7 +789,7 @@ class Isogeo2docx(object):
                 # prevent invalid character for XML formatting in description
                 evt.description = self.fmt.clean_xml(evt.description)
                 # make data human readable
-                evt.date = utils.hlpr_datetimes(evt.date).strftime(self.dates_fmt)
+                evt.date = self._format_datetime(evt.date, self.dates_fmt)
                 # translate event kind
                 # evt.kind = self.isogeo_tr("events", evt.kind)
                 # append
@@ -249,85 +802,737 @@ class Isogeo2docx(object):
         # ---- HISTORY # -----------------------------------------------------
         # data events
         if md.created:
-            context["varDataDtCrea"] = utils.hlpr_datetimes(md.created).strftime(
-                self.dates_fmt
-            )
+            context["varDataDtCrea"] = self._format_datetime(md.created, self.dates_fmt)
 
         if md.modified:
-            context["varDataDtUpda"] = utils.hlpr_datetimes(md.modified).strftime(
-                self.dates_fmt
+            context["varDataDtUpda"] = self._format_datetime(
+                md.modified, self.dates_fmt
             )
 
         if md.published:
-            context["varDataDtPubl"] = utils.hlpr_datetimes(md.published).strftime(
-                self.dates_fmt
+            context["varDataDtPubl"] = self._format_datetime(
+                md.published, self.dates_fmt
             )
 
         # validity
         if md.validFrom:
-            context["varValidityStart"] = utils.hlpr_datetimes(md.validFrom).strftime(
-                self.dates_fmt
+            context["varValidityStart"] = self._format_datetime(
+                md.validFrom, self.dates_fmt
             )
 
         # end validity date
         if md.validTo:
-            context["varValidityEnd"] = utils.hlpr_datetimes(md.validTo).strftime(
-                self.dates_fmt
+            context["varValidityEnd"] = self._format_datetime(
+                md.validTo, self.dates_fmt
             )
 
         # ---- SPECIFICATIONS # -----------------------------------------------
-        if md.specifications:
+        if md.specifications and "varSpecifications" in variables:
             context["varSpecifications"] = self.fmt.specifications(
                 md_specifications=md.specifications
             )
 
         # ---- CGUs # --------------------------------------------------------
-        if md.conditions:
+        if md.conditions and "varConditions" in variables:
             context["varConditions"] = self.fmt.conditions(md_conditions=md.conditions)
 
         # ---- LIMITATIONS # -------------------------------------------------
-        if md.limitations:
+        if md.limitations and "varLimitations" in variables:
             context["varLimitations"] = self.fmt.limitations(
                 md_limitations=md.limitations
             )
 
         # -- THUMBNAIL -----------------------------------------------------------------
-        if md._id in self.thumbnails and Path(self.thumbnails.get(md._id)).is_file():
-            thumbnail = str(Path(self.thumbnails.get(md._id)).resolve())
-            context["varThumbnail"] = InlineImage(docx_template, thumbnail)
+        if md._id in self.thumbnails and "varThumbnail" in variables:
+            context["varThumbnail"] = self.thumbnails.get(md._id)
             logger.info(
-                "Thumbnail found for {}: {}".format(md.title_or_name(1), thumbnail)
+                "Thumbnail found for {}: {}".format(
+                    md.title_or_name(1), context.get("varThumbnail")
+                )
             )
 
-        # fillfull file
+        return context
+
+    # -- BATCH EXPORT ----------------------------------------------------------------
+    def catalog2docx(
+        self,
+        template_path: Path,
+        metadatas,
+        out_docx: Path,
+        share: Share = None,
+        page_breaks: bool = True,
+        toc_levels: int = None,
+        shares_index: dict = None,
+    ) -> int:
+        """Export many metadatas into a single Word document: the template body is
+        repeated for each metadata. Metadatas are consumed lazily and the document is
+        compressed on the fly, so memory does not grow with the catalog size.
+
+        :param Path template_path: path to the Word template
+        :param metadatas: iterable of Metadata (or raw API dictionaries)
+        :param Path out_docx: output path (or writable binary file object)
+        :param Share share: share in which the metadatas are. Used to build view URLs.
+        :param bool page_breaks: start each metadata sheet on a new page
+        :param int toc_levels: insert a table of contents of the headings up to this \
+        level (1 = one entry by metadata title)
+        :param dict shares_index: OpenCatalog URL prefix by metadata UUID, used \
+        without share (see `index_shares`). Defaults to the exporter one.
+
+        :returns: number of metadata sheets written
+        :rtype: int
+        """
+        export_date = self.now()
+        template_cache = self.get_template_cache(template_path)
+        variables = template_cache.variables()
+        with CatalogWriter(
+            template_cache,
+            out_docx=str(out_docx) if isinstance(out_docx, Path) else out_docx,
+            page_breaks=page_breaks,
+            toc_levels=toc_levels,
+            context={"varMdDtExp": export_date},
+        ) as catalog:
+            for md in metadatas:
+                if isinstance(md, dict):
+                    md = Metadata.clean_attributes(md)
+                if self.metrics is not None:
+                    self.metrics.begin_record()
+
+                with self._stage("context"):
+                    context = self.build_context(
+                        md, share, export_date, variables, shares_index
+                    )
+                try:
+                    with self._stage("thumbnail"):
+                        context = self.bind_context(catalog.template, context)
+                    with self._stage("render"):
+                        catalog.add_sheet(context, autoescape=True)
+                except Exception as e:
+                    logger.error(
+                        "Metadata sheet of {} skipped: {}. Check: {}".format(
+                            md._id, e, context.get("varEditAPP")
+                        )
+                    )
+
+                if self.metrics is not None:
+                    self.metrics.end_record(md._id)
+
+        logger.info("{} metadatas stored into the catalog.".format(catalog.count))
+        if self.metrics is not None:
+            self.metrics.log_summary()
+        return catalog.count
+
+    def docx_filename(self, md: Metadata) -> str:
+        """Returns the file name of a metadata document:
+        `{slugged title}_{5 first chars of UUID}.docx`.
+
+        :param Metadata md: metadata
+        """
+        return "{}_{}.docx".format(md.title_or_name(slugged=1), md._id[:5])
+
+    def export_archive(
+        self,
+        template_path: Path,
+        metadatas,
+        out_archive,
+        archive_format: str = "zip",
+        share: Share = None,
+        compress: bool = True,
+    ) -> int:
+        """Export metadatas into an archive of Word documents (see `docx_filename`).
+        Each document is written into the archive as soon as it is rendered: there is
+        no temporary file and memory does not grow with the number of metadatas.
+        Documents failing to render or save are logged and skipped.
+
+        :param Path template_path: path to the Word template
+        :param metadatas: iterable of Metadata (or raw API dictionaries)
+        :param out_archive: output path or writable binary file object (which does \
+        not need to be seekable: socket, HTTP response...)
+        :param str archive_format: zip, tar or tar.gz
+        :param Share share: share in which the metadatas are. Used to build view URLs.
+        :param bool compress: compress the documents (see `md2bytes`). ZIP members \
+        are stored as is, to avoid compressing twice.
+
+        :returns: number of documents written
+        :rtype: int
+
+        :Example:
+
+        .. code-block:: python
+
+            with open("catalog.zip", "wb") as out_archive:
+                to_docx.export_archive(template_path, search.results, out_archive)
+        """
+        export_date = self.now()
+        with ArchiveWriter(out_archive, archive_format=archive_format) as archive:
+            for md in metadatas:
+                if isinstance(md, dict):
+                    md = Metadata.clean_attributes(md)
+                if self.metrics is not None:
+                    self.metrics.begin_record()
+
+                tpl = self.get_template(template_path)
+                content = None
+                if self.md2docx(
+                    docx_template=tpl, md=md, share=share, export_date=export_date
+                ):
+                    # saved apart first: a failure must not truncate the archive
+                    try:
+                        with self._stage("save"):
+                            content = BytesIO()
+                            save_docx(tpl, content, compress=compress)
+                    except Exception as e:
+                        logger.error("Document of {} skipped: {}".format(md._id, e))
+                        content = None
+                else:
+                    logger.error("Document of {} skipped.".format(md._id))
+
+                if content is not None:
+                    archive.add(self.docx_filename(md), content.getbuffer())
+
+                if self.metrics is not None:
+                    self.metrics.end_record(md._id)
+
+        logger.info("{} documents stored into the archive.".format(archive.count))
+        if self.metrics is not None:
+            self.metrics.log_summary()
+        return archive.count
+
+    def export(
+        self,
+        template_path: Path,
+        md: Metadata,
+        out_dir: Path,
+        share: Share = None,
+        export_date: str = None,
+        shares_index: dict = None,
+    ) -> dict:
+        """Fill a copy of the template with a metadata and save it into the output
+        folder as `{slugged title}_{5 first chars of UUID}.docx`.
+
+        :param Path template_path: path to the Word template
+        :param Metadata md: metadata to export. Raw API dictionaries are accepted.
+        :param Path out_dir: output folder
+        :param Share share: share in which the metadata is. Used to build the view URL.
+        :param str export_date: formatted export date. Defaults to now.
+        :param dict shares_index: OpenCatalog URL prefix by metadata UUID, used \
+        without share (see `index_shares`). Defaults to the exporter one.
+
+        :returns: export status: {"_id", "status" ("done" or "error"), "path", "error"}\
+        and stages durations ("timings") if instrumentation is enabled. "cached" is \
+        True if the document comes from the render cache.
+        :rtype: dict
+        """
+        if isinstance(md, dict):
+            md = Metadata.clean_attributes(md)
+
+        out_docx_path = Path(out_dir) / self.docx_filename(md)
+        status = {"_id": md._id, "status": "error", "path": None, "error": None}
+        if self.metrics is not None:
+            self.metrics.begin_record()
+
         try:
-            docx_template.render(context, autoescape=True)
-            logger.info(
-                "Vector metadata stored: {} ({})".format(
-                    md.title_or_name(slugged=1), md._id
+            with self._stage("load"):
+                template_cache = self.get_template_cache(template_path)
+            with self._stage("context"):
+                context = self.build_context(
+                    md, share, export_date, template_cache.variables(), shares_index
                 )
-            )
-        except etree.XMLSyntaxError as e:
-            logger.error(
-                "Invalid character in XML: {}. "
-                "Any special character (<, <, &...)? Check: {}".format(
-                    e, context.get("varEditAPP")
+
+            cache_key = None
+            if self.render_cache is not None:
+                cache_key = self.render_cache.key(
+                    context, template_cache.template_hash, self.render_options()
                 )
+
+            if cache_key is not None and self.render_cache.restore(
+                cache_key, out_docx_path
+            ):
+                status["cached"] = True
+                done = True
+            else:
+                with self._stage("load"):
+                    tpl = template_cache.new_template()
+                done = self.render_context(tpl, context)
+                if done:
+                    with self._stage("save"):
+                        # never write through a link to a cached document
+                        if cache_key is not None and out_docx_path.exists():
+                            out_docx_path.unlink()
+                        tpl.save(str(out_docx_path))
+                    if cache_key is not None:
+                        self.render_cache.store(cache_key, out_docx_path)
+
+            if done:
+                status["status"] = "done"
+                status["path"] = str(out_docx_path)
+            else:
+                status["error"] = "Rendering failed. See logs for details."
+        except Exception as e:
+            logger.error("Export of {} failed: {}".format(md._id, e))
+            status["error"] = str(e)
+
+        if self.metrics is not None:
+            status["timings"] = self.metrics.end_record(md._id)
+
+        return status
+
+    def render_options(self) -> tuple:
+        """Returns the exporter parameters changing documents beyond their template
+        and context, used in render cache keys."""
+        return (
+            __version__,
+            self.thumbnails_max_width,
+            self.thumbnails_dpi,
+            self.embed_fonts,
+            self.max_image_width,
+        )
+
+    def options_hash(self, share: Share = None, shares_index: dict = None) -> str:
+        """Returns a hash of the exporter parameters changing documents besides the
+        metadata, the template and the thumbnail: language, links, feature attributes
+        cap, media options (see `render_options`), share and shares index. Used in
+        export manifests.
+
+        :param Share share: share in which the metadatas are exported
+        :param dict shares_index: shares index of the export. Defaults to the \
+        exporter one.
+
+        :rtype: str
+        """
+        if shares_index is None:
+            shares_index = self.shares_index
+        options = {
+            "render": self.render_options(),
+            "lang": self.lang.upper(),
+            "max_fields": self.max_fields,
+            "url_base_edit": self.url_base_edit,
+            "url_base_view": self.url_base_view,
+            "share": self.get_view_url_prefix(share) if share else None,
+            "shares_index": sorted(shares_index.items()),
+        }
+        content = json.dumps(options, sort_keys=True, default=str)
+        return hashlib.sha256(content.encode("UTF-8")).hexdigest()
+
+    def export_state(
+        self,
+        md: Metadata,
+        template_hash: str = None,
+        out_dir: Path = None,
+        options_hash: str = None,
+    ) -> dict:
+        """Returns what the export of a metadata depends on, to be stored in an
+        export manifest: UUID, modification date, template hash, thumbnail
+        modification time, output path and exporter options.
+
+        :param Metadata md: metadata (or raw API dictionary)
+        :param str template_hash: hash of the template file
+        :param Path out_dir: output folder
+        :param str options_hash: hash of the exporter options (see `options_hash`)
+
+        :rtype: dict
+        """
+        if isinstance(md, dict):
+            md_id, md_modified = md.get("_id"), md.get("_modified")
+            # only what the file name is made of: the dictionary is left as is
+            md = Metadata(_id=md_id, name=md.get("name"), title=md.get("title"))
+        else:
+            md_id, md_modified = md._id, md._modified
+
+        out_path = None
+        if out_dir is not None:
+            out_path = str((Path(out_dir) / self.docx_filename(md)).resolve())
+
+        thumbnail_mtime = None
+        if md_id in self.thumbnails:
+            try:
+                thumbnail_mtime = Path(self.thumbnails.get(md_id)).stat().st_mtime
+            except OSError:
+                pass
+
+        return {
+            "_id": md_id,
+            "_modified": md_modified,
+            "template_hash": template_hash,
+            "thumbnail_mtime": thumbnail_mtime,
+            "out_path": out_path,
+            "options_hash": options_hash,
+        }
+
+    def export_share(
+        self,
+        template_path: Path,
+        share: Share,
+        metadatas,
+        out_dir: Path,
+        workers: int = None,
+        manifest: ExportManifest = None,
+    ):
+        """Export the metadatas of a share, each one linked to the share OpenCatalog
+        (whose URL is formatted once). See `export_many` for the other parameters.
+
+        To export metadatas of several shares at once, index them (`index_shares`) \
+        and pass the index to `export_many`, without share.
+
+        :param Path template_path: path to the Word template
+        :param Share share: share to export
+        :param metadatas: iterable of the share Metadata (or raw API dictionaries)
+        :param Path out_dir: output folder
+
+        :returns: generator of export status (see `export`), in completion order
+        """
+        logger.info(
+            "Export of the share {} ({})".format(
+                share.name, self.get_view_url_prefix(share)
             )
-        except (UnicodeEncodeError, UnicodeDecodeError) as e:
-            logger.error(
-                "Encoding error: {}. "
-                "Any special character (<, <, &...)? Check: {}".format(
-                    e, context.get("varEditAPP")
+        )
+        return self.export_many(
+            template_path,
+            metadatas,
+            out_dir,
+            workers=workers,
+            share=share,
+            manifest=manifest,
+        )
+
+    def export_many(
+        self,
+        template_path: Path,
+        metadatas,
+        out_dir: Path,
+        workers: int = None,
+        share: Share = None,
+        manifest: ExportManifest = None,
+        shares_index: dict = None,
+    ):
+        """Export metadatas into Word documents, spreading rendering and saving across
+        a pool of processes. Each worker process loads the template and the translator
+        only once.
+
+        Metadatas are consumed lazily and only a few are pending at a time, so any
+        iterable (including a generator) can be passed.
+
+        :param Path template_path: path to the Word template
+        :param metadatas: iterable of Metadata (or raw API dictionaries)
+        :param Path out_dir: output folder
+        :param int workers: number of worker processes. Defaults to CPU count. \
+        If 1, export runs in the current process.
+        :param Share share: share in which the metadatas are. Used to build view URLs.
+        :param ExportManifest manifest: manifest (or path to) of previous exports. \
+        If set, only new or changed metadatas are exported, others are "skipped". \
+        Metadatas exported into another folder or with other options are exported \
+        again.
+        :param dict shares_index: OpenCatalog URL prefix by metadata UUID, used \
+        without share (see `index_shares`). Defaults to the exporter one.
+
+        :returns: generator of export status (see `export`), in completion order
+        """
+        workers = workers or cpu_count() or 1
+        # same export date for the whole batch
+        export_date = self.now()
+        Path(out_dir).mkdir(parents=True, exist_ok=True)
+        template_path = str(Path(template_path).resolve())
+
+        # incremental export
+        template_hash = options_hash = None
+        own_manifest = False
+        if manifest is not None:
+            if not isinstance(manifest, ExportManifest):
+                manifest = ExportManifest(manifest)
+                own_manifest = True
+            template_hash = hash_file(template_path)
+            options_hash = self.options_hash(share, shares_index)
+
+        def recorded(state: dict, status: dict) -> dict:
+            if manifest is not None and status.get("status") == "done":
+                manifest.record(state, status.get("path"))
+            return status
+
+        def collected(future) -> dict:
+            status = future.result()
+            # stages timed in the worker process
+            if self.metrics is not None and status.get("timings") is not None:
+                self.metrics.add_record(status.get("_id"), status.get("timings"))
+            return recorded(pending.pop(future), status)
+
+        worker_params = {
+            "lang": self.lang,
+            "thumbnails": self.thumbnails,
+            "url_base_edit": self.url_base_edit,
+            "url_base_view": self.url_base_view,
+            "thumbnails_max_width": self.thumbnails_max_width,
+            "thumbnails_dpi": self.thumbnails_dpi,
+            "max_fields": self.max_fields,
+            "embed_fonts": self.embed_fonts,
+            "max_image_width": self.max_image_width,
+            "render_cache": self.render_cache,
+            "shares_index": self.shares_index if shares_index is None else shares_index,
+            "use_artifacts": self.use_artifacts,
+            "metrics": self.metrics.worker_copy() if self.metrics else None,
+        }
+
+        with ExitStack() as stack:
+            if manifest is not None:
+                stack.callback(manifest.close if own_manifest else manifest.commit)
+
+            # process pool, unless serial mode. Exporter parameters are serialized
+            # once, workers instanciate their exporter at their first export (pool
+            # initializers require Python 3.7)
+            executor = None
+            if workers > 1:
+                executor = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+                worker_exporter = (
+                    uuid4().hex,
+                    pickle.dumps(worker_params, protocol=pickle.HIGHEST_PROTOCOL),
                 )
-            )
-        except Exception as e:
-            logger.error(
-                "Unexpected error: {}. Check: {}".format(e, context.get("varEditAPP"))
+
+            pending = {}  # future: export state
+            for md in metadatas:
+                state = None
+                if manifest is not None:
+                    state = self.export_state(md, template_hash, out_dir, options_hash)
+                    out_path = manifest.lookup(state)
+                    if out_path:
+                        yield {
+                            "_id": state.get("_id"),
+                            "status": "skipped",
+                            "path": out_path,
+                            "error": None,
+                        }
+                        continue
+
+                if executor is None:
+                    yield recorded(
+                        state,
+                        self.export(
+                            template_path, md, out_dir, share, export_date, shares_index
+                        ),
+                    )
+                    continue
+
+                future = executor.submit(
+                    _export_worker,
+                    worker_exporter,
+                    template_path,
+                    md,
+                    out_dir,
+                    share,
+                    export_date,
+                )
+                pending[future] = state
+                # backpressure: do not pull more metadatas than workers can handle
+                if len(pending) >= workers * 2:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield collected(future)
+
+            for future in as_completed(list(pending)):
+                yield collected(future)
+
+        if self.metrics is not None:
+            self.metrics.log_summary()
+
+    # -- ASYNC EXPORT ----------------------------------------------------------------
+
+    def _get_async_semaphore(self) -> asyncio.Semaphore:
+        """Returns the semaphore bounding concurrent exports in the running loop,
+        created at its first export. Loops sharing the exporter keep their own one,
+        and are bounded together by the exporter thread pool."""
+        # running loop when called from a coroutine, on Python 3.6 too
+        loop = asyncio.get_event_loop()
+        with self._async_lock:
+            semaphore = self._async_semaphores.get(loop)
+            if semaphore is None:
+                semaphore = asyncio.Semaphore(self.async_workers)
+                self._async_semaphores[loop] = semaphore
+        return semaphore
+
+    async def export_async(
+        self,
+        template_path: Path,
+        md: Metadata,
+        share: Share = None,
+        export_date: str = None,
+        executor=None,
+        compress: bool = True,
+    ) -> bytes:
+        """Export a metadata without blocking the event loop: rendering and saving run
+        in a thread pool. At most `async_workers` documents are rendered at once, other
+        calls wait for their turn.
+
+        :param Path template_path: path to the Word template
+        :param Metadata md: metadata to export. Raw API dictionaries are accepted.
+        :param Share share: share in which the metadata is. Used to build the view URL.
+        :param str export_date: formatted export date. Defaults to now.
+        :param executor: executor to use instead of the exporter thread pool
+        :param bool compress: compress the document (see `md2bytes`)
+
+        :raises ValueError: if rendering failed
+
+        :returns: Word document
+        :rtype: bytes
+
+        :Example:
+
+        .. code-block:: python
+
+            async def handler(request):
+                docx = await to_docx.export_async(template_path, md)
+        """
+        if executor is None:
+            with self._async_lock:
+                if self._async_executor is None:
+                    self._async_executor = ThreadPoolExecutor(
+                        max_workers=self.async_workers,
+                        thread_name_prefix="isogeo2docx",
+                    )
+                executor = self._async_executor
+
+        async with self._get_async_semaphore():
+            return await asyncio.get_event_loop().run_in_executor(
+                executor,
+                partial(
+                    self.md2bytes,
+                    template_path,
+                    md,
+                    share=share,
+                    export_date=export_date,
+                    compress=compress,
+                ),
             )
 
-        # end of function
-        return
+    async def export_stream_async(
+        self,
+        template_path: Path,
+        md: Metadata,
+        share: Share = None,
+        export_date: str = None,
+        chunk_size: int = 65536,
+        compress: bool = True,
+    ):
+        """Export a metadata (see `export_async`) and yield the document by chunks, to
+        be streamed as a response body.
+
+        :param int chunk_size: number of bytes by chunk
+
+        :returns: asynchronous generator of bytes
+        """
+        docx = await self.export_async(
+            template_path, md, share, export_date, compress=compress
+        )
+        for start in range(0, len(docx), chunk_size):
+            yield docx[start : start + chunk_size]
+            # let other tasks run between chunks
+            await asyncio.sleep(0)
+
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def get_exporter(
+    lang: str = "FR",
+    templates: tuple = (),
+    url_base_edit: str = "https://app.isogeo.com",
+    url_base_view: str = "https://open.isogeo.com",
+    thumbnails_max_width: int = None,
+    thumbnails_dpi: int = None,
+    max_fields: int = None,
+    embed_fonts: bool = True,
+    max_image_width: int = None,
+    use_artifacts: bool = False,
+) -> Isogeo2docx:
+    """Returns an exporter shared by the whole process, created at first call for a
+    language and parameters. Templates passed are parsed and compiled in advance, so
+    the first export does not pay for it.
+
+    Meant for services creating an exporter per request: translations, formatter,
+    parsed templates and processed images are set up once. Shared exporters have no
+    thumbnails table nor instrumentation: instanciate Isogeo2docx to use them.
+
+    :param str lang: selected language for output
+    :param tuple templates: paths to the Word templates to prepare
+    :param str url_base_edit: base url to format edit links (basically app.isogeo.com)
+    :param str url_base_view: base url to format view links (basically open.isogeo.com)
+    :param int thumbnails_max_width: see Isogeo2docx
+    :param int thumbnails_dpi: see Isogeo2docx
+    :param int max_fields: see Isogeo2docx
+    :param bool embed_fonts: see Isogeo2docx
+    :param int max_image_width: see Isogeo2docx
+    :param bool use_artifacts: see Isogeo2docx
+
+    :rtype: Isogeo2docx
+
+    :Example:
+
+    .. code-block:: python
+
+        to_docx = get_exporter(lang="EN", templates=("template_Isogeo.docx",))
+        tpl = to_docx.get_template("template_Isogeo.docx")
+        to_docx.md2docx(tpl, metadata)
+    """
+    key = (
+        lang.upper(),
+        url_base_edit,
+        url_base_view,
+        thumbnails_max_width,
+        thumbnails_dpi,
+        max_fields,
+        embed_fonts,
+        max_image_width,
+        use_artifacts,
+    )
+    exporter = _shared_exporters.get(key)
+    if exporter is None:
+        with _shared_exporters_lock:
+            exporter = _shared_exporters.get(key)
+            if exporter is None:
+                exporter = Isogeo2docx(
+                    lang=lang,
+                    url_base_edit=url_base_edit,
+                    url_base_view=url_base_view,
+                    thumbnails_max_width=thumbnails_max_width,
+                    thumbnails_dpi=thumbnails_dpi,
+                    max_fields=max_fields,
+                    embed_fonts=embed_fonts,
+                    max_image_width=max_image_width,
+                    use_artifacts=use_artifacts,
+                )
+                _shared_exporters[key] = exporter
+
+    for template_path in templates:
+        exporter.get_template_cache(template_path).compiled(True)
+
+    return exporter
+
+
+def _get_worker_exporter(worker_exporter: tuple) -> Isogeo2docx:
+    """Returns the exporter of the current worker process, instanciated (translator,
+    formatter) at its first export, then reused for all the metadatas handled by
+    this process.
+
+    :param tuple worker_exporter: key and pickled Isogeo2docx parameters
+    """
+    global _worker_exporter, _worker_exporter_key
+    key, exporter_params = worker_exporter
+    if _worker_exporter_key != key:
+        _worker_exporter = Isogeo2docx(**pickle.loads(exporter_params))
+        _worker_exporter_key = key
+    return _worker_exporter
+
+
+def _export_worker(
+    worker_exporter: tuple,
+    template_path: str,
+    md: Metadata,
+    out_dir: Path,
+    share: Share = None,
+    export_date: str = None,
+) -> dict:
+    """Export a metadata with the exporter of the current worker process."""
+    return _get_worker_exporter(worker_exporter).export(
+        template_path, md, out_dir, share, export_date
+    )
 
 
 # ###############################################################################
@@ -430,20 +1635,10 @@ if __name__ == "__main__":
     toDocx = Isogeo2docx(thumbnails=thumbnails_dict)
 
     # parse results and export it
-    for md in search_results.results:
-        # load metadata as object
-        metadata = Metadata.clean_attributes(md)
-        # prepare the template
-        tpl = DocxTemplate(template_path.resolve())
-        # fill the template
-        toDocx.md2docx(docx_template=tpl, md=metadata)
-        # filename
-        md_name = metadata.title_or_name(slugged=1)
-        uuid = "{}".format(metadata._id[:5])
-        out_docx_filename = "_output/{}_{}.docx".format(md_name, uuid)
-
-        # save it
-        tpl.save(out_docx_filename)
-
-        # delete template object
-        del tpl
+    for status in toDocx.export_many(
+        template_path=template_path,
+        metadatas=search_results.results,
+        out_dir=Path("_output/"),
+        workers=2,
+    ):
+        logger.info(status)
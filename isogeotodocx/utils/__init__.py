@@ -2,3 +2,19 @@
 #! python3  # noqa: E265
 
 from .formatter import Formatter  # noqa: F401
+from .template_cache import (  # noqa: F401
+    CachedDocxTemplate,
+    TemplateCache,
+    precompile_template,
+)
+from .search_reader import iter_search_results  # noqa: F401
+from .manifest import ExportManifest, hash_file  # noqa: F401
+from .thumbnails import ThumbnailCache  # noqa: F401
+from .catalog import CatalogWriter  # noqa: F401
+from .metrics import ExportMetrics  # noqa: F401
+from .dates import DateFormatter  # noqa: F401
+from .translations import TranslationTable, get_translation_table  # noqa: F401
+from .docx_writer import precompress_parts, save_docx, write_package  # noqa: F401
+from .media import slim_package  # noqa: F401
+from .archive import ArchiveWriter  # noqa: F401
+from .render_cache import RenderCache  # noqa: F401
@@ -0,0 +1,119 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Archive (ZIP or TAR) of documents written on the fly, into a file or any
+    writable stream (socket, HTTP response...), without temporary files.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+import tarfile
+import time
+import zipfile
+from io import BytesIO
+from pathlib import Path
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+_tar_modes = {"tar": "w|", "tar.gz": "w|gz"}
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class ArchiveWriter(object):
+    """Write documents one by one into an archive. A ZIP member is written while the
+    document is saved, a TAR member needs the document size first: it is held in
+    memory until written. Either way, only one document at a time is in memory.
+
+    The output does not need to be seekable. If the archive is written into a path,
+    the file is deleted when an exception is raised inside the `with` block.
+
+    :param out_archive: output path or writable binary file object
+    :param str archive_format: zip, tar or tar.gz
+    :param bool compress: deflate ZIP members. Documents being compressed already, \
+    it is disabled by default to avoid compressing twice.
+    """
+
+    def __init__(
+        self, out_archive, archive_format: str = "zip", compress: bool = False
+    ):
+        self.archive_format = archive_format
+        self.count = 0
+        self.path = None if hasattr(out_archive, "write") else Path(out_archive)
+
+        if archive_format == "zip":
+            self.compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+            self.archive = zipfile.ZipFile(out_archive, "w")
+        elif archive_format in _tar_modes:
+            mode = _tar_modes.get(archive_format)
+            if hasattr(out_archive, "write"):
+                self.archive = tarfile.open(fileobj=out_archive, mode=mode)
+            else:
+                self.archive = tarfile.open(name=str(out_archive), mode=mode)
+        else:
+            raise ValueError(
+                "Archive format must be one of: zip, {}. Got: {}".format(
+                    ", ".join(_tar_modes), archive_format
+                )
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *args):
+        self.close()
+        # do not leave a truncated archive behind
+        if exc_type is not None and self.path is not None and self.path.is_file():
+            self.path.unlink()
+            logger.error("Incomplete archive deleted: {}".format(self.path))
+
+    def add(self, name: str, write):
+        """Add a member to the archive.
+
+        :param str name: member name
+        :param write: member content (bytes) or function writing it into the binary \
+        file object it is passed, e.g. `lambda out: save_docx(tpl, out)`
+        """
+        data = write if isinstance(write, (bytes, bytearray, memoryview)) else None
+
+        if self.archive_format == "zip":
+            member = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            member.compress_type = self.compression
+            with self.archive.open(member, "w") as out_member:
+                if data is None:
+                    write(out_member)
+                else:
+                    out_member.write(data)
+        else:
+            content = BytesIO()
+            if data is None:
+                write(content)
+            else:
+                content.write(data)
+            member = tarfile.TarInfo(name)
+            member.size = content.tell()
+            member.mtime = time.time()
+            content.seek(0)
+            self.archive.addfile(member, content)
+
+        self.count += 1
+
+    def close(self):
+        """Write the end of the archive."""
+        if self.archive is None:
+            return
+        self.archive.close()
+        self.archive = None
+        logger.debug("Archive of {} documents written.".format(self.count))
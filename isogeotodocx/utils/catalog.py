@@ -0,0 +1,219 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Write many metadata sheets into a single Word document, repeating the template
+    body instead of instanciating a template per metadata.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+import zipfile
+
+# 3rd party library
+from docx.oxml import parse_xml
+from docx.oxml.ns import nsdecls, qn
+from docxtpl import etree
+
+# submodules
+from .docx_writer import write_package
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+_page_break_xml = '<w:p><w:r><w:br w:type="page"/></w:r></w:p>'
+_toc_xml = (
+    "<w:p>"
+    '<w:r><w:fldChar w:fldCharType="begin" w:dirty="true"/></w:r>'
+    '<w:r><w:instrText xml:space="preserve"> TOC \\o "1-{levels}" \\h \\z \\u '
+    "</w:instrText></w:r>"
+    '<w:r><w:fldChar w:fldCharType="separate"/></w:r>'
+    "<w:r><w:t>{placeholder}</w:t></w:r>"
+    '<w:r><w:fldChar w:fldCharType="end"/></w:r>'
+    "</w:p>"
+)
+# elements following w:updateFields in w:settings (ECMA-376 CT_Settings sequence)
+_settings_after_update_fields = (
+    "w:hdrShapeDefaults",
+    "w:footnotePr",
+    "w:endnotePr",
+    "w:compat",
+    "w:docVars",
+    "w:rsids",
+    "m:mathPr",
+    "w:attachedSchema",
+    "w:themeFontLang",
+    "w:clrSchemeMapping",
+    "w:doNotIncludeSubdocsInStats",
+    "w:doNotAutoCompressPictures",
+    "w:forceUpgrade",
+    "w:captions",
+    "w:readModeInkLockDown",
+    "w:smartTagType",
+    "sl:schemaLibrary",
+    "w:shapeDefaults",
+    "w:doNotEmbedSmartTags",
+    "w:decimalSymbol",
+    "w:listSeparator",
+)
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class CatalogWriter(object):
+    """Stream rendered sheets into the body of a single document. Only the sheet being
+    rendered is held in memory: the document body is compressed on the fly into the
+    output file.
+
+    :param TemplateCache template_cache: parsed template
+    :param out_docx: output path or writable binary file object
+    :param bool page_breaks: insert a page break between sheets
+    :param int toc_levels: if set, insert a table of contents of the headings up to \
+    this level at the beginning of the document. Word fills it when opening the file.
+    :param str toc_placeholder: text displayed until the table of contents is updated
+    :param dict context: context used to render headers and footers
+    """
+
+    def __init__(
+        self,
+        template_cache,
+        out_docx,
+        page_breaks: bool = True,
+        toc_levels: int = None,
+        toc_placeholder: str = "Right-click to update the table of contents.",
+        context: dict = None,
+    ):
+        self.template_cache = template_cache
+        self.page_breaks = page_breaks
+        self.count = 0
+
+        # template used as package: images and links of all sheets are added to it
+        self.template = template_cache.new_template()
+        self.document_part = self.template.docx.part
+        body = self.template.docx.element.body
+        for child in list(body):
+            if child is not body.sectPr:
+                body.remove(child)
+
+        # headers and footers are shared by all sheets: render them once
+        _, headers_footers = template_cache.compiled(True)
+        for rel_key, encoding, template in headers_footers:
+            xml = template_cache.render_compiled(template, context or {})
+            self.template.map_headers_footers_xml(rel_key, xml.encode(encoding))
+
+        # ids which must be unique in the whole document
+        self._next_drawing_id = 1
+        self._next_bookmark_id = 0
+
+        # document.xml opening and ending, around the sheets
+        document_xml = etree.tostring(
+            self.document_part.element, encoding="UTF-8", standalone=True
+        ).decode("UTF-8")
+        if body.sectPr is not None:
+            split_at = document_xml.index("<w:sectPr")
+        else:
+            document_xml = document_xml.replace("<w:body/>", "<w:body></w:body>")
+            split_at = document_xml.index("</w:body>")
+        self._document_end = document_xml[split_at:]
+
+        self.zip_out = zipfile.ZipFile(out_docx, "w", compression=zipfile.ZIP_DEFLATED)
+        self.document_out = self.zip_out.open(
+            self.document_part.partname.membername, "w"
+        )
+        self._write(document_xml[:split_at])
+
+        if toc_levels:
+            self._write(
+                _toc_xml.format(levels=toc_levels, placeholder=toc_placeholder)
+            )
+            self._write(_page_break_xml)
+            self._update_fields_on_open()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _write(self, xml: str):
+        self.document_out.write(xml.encode("UTF-8"))
+
+    def _update_fields_on_open(self):
+        """Ask Word to update fields (the table of contents) when opening the file."""
+        settings = self.template.docx.settings.element
+        if settings.find(qn("w:updateFields")) is None:
+            settings.insert_element_before(
+                parse_xml('<w:updateFields {} w:val="true"/>'.format(nsdecls("w"))),
+                *_settings_after_update_fields
+            )
+
+    def _renumber(self, body):
+        """Make drawings and bookmarks ids unique across sheets."""
+        for drawing in body.iter(qn("wp:docPr")):
+            drawing.set("id", str(self._next_drawing_id))
+            self._next_drawing_id += 1
+
+        bookmarks = {}
+        for tag in ("w:bookmarkStart", "w:bookmarkEnd"):
+            for bookmark in body.iter(qn(tag)):
+                old_id = bookmark.get(qn("w:id"))
+                if old_id not in bookmarks:
+                    bookmarks[old_id] = str(self._next_bookmark_id)
+                    self._next_bookmark_id += 1
+                bookmark.set(qn("w:id"), bookmarks.get(old_id))
+
+    def add_sheet(self, context: dict, autoescape: bool = True):
+        """Render the template body with the context and append it to the document.
+
+        Images of the context must be bound to `self.template`.
+
+        :param dict context: template context of a metadata
+        :param bool autoescape: Jinja autoescape mode
+        """
+        body = self.template.fix_tables(
+            self.template_cache.render_body(context, autoescape)
+        )
+        sect_pr = body.find(qn("w:sectPr"))
+        if sect_pr is not None:
+            body.remove(sect_pr)
+        self._renumber(body)
+
+        # body children, without the namespaces declared on the body itself
+        body_xml = etree.tostring(body, encoding="unicode")
+        if body_xml.endswith("/>"):
+            return
+        sheet_xml = body_xml[body_xml.index(">") + 1 : body_xml.rindex("</")]
+
+        if self.count and self.page_breaks:
+            self._write(_page_break_xml)
+        self._write(sheet_xml)
+        self.count += 1
+
+    def close(self):
+        """Write the end of the document and the other parts of the package."""
+        if self.zip_out is None:
+            return
+
+        self._write(self._document_end)
+        self.document_out.close()
+
+        write_package(
+            self.zip_out,
+            self.document_part.package,
+            skip=(self.document_part,),
+            members=self.template_cache.precompressed(),
+        )
+
+        self.zip_out.close()
+        self.zip_out = None
+        logger.debug("Catalog of {} sheets written.".format(self.count))
@@ -0,0 +1,72 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Dates formatting with a bounded cache: across a catalog, many dates repeat
+    (bulk-imported metadatas, events dates...).
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+from functools import lru_cache
+
+# 3rd party library
+from isogeo_pysdk import IsogeoUtils
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class DateFormatter(object):
+    """Format dates returned by the API, caching the last results by raw date and
+    format. Thread-safe.
+
+    Results depend on the process locale (days and months names): call `cache_clear`
+    after changing it.
+
+    :param int maxsize: maximum number of formatted dates kept in cache
+
+    :Example:
+
+    .. code-block:: python
+
+        DateFormatter().format("2019-06-13T16:21:38.1917618+00:00", "%d/%m/%Y")
+        >>> "13/06/2019"
+    """
+
+    def __init__(self, maxsize: int = 4096):
+        self.maxsize = maxsize
+        self.format = lru_cache(maxsize=maxsize)(self._format)
+
+    @staticmethod
+    def _format(in_date: str, fmt: str) -> str:
+        """Parse a date returned by the API and format it.
+
+        :param str in_date: date or datetime as returned by the API
+        :param str fmt: strftime format
+        """
+        return IsogeoUtils.hlpr_datetimes(in_date).strftime(fmt)
+
+    def cache_info(self):
+        """Returns cache statistics: hits, misses, maxsize, currsize."""
+        return self.format.cache_info()
+
+    def cache_clear(self):
+        """Empty the cache."""
+        self.format.cache_clear()
+
+
+# default formatter, shared by exporters and formatters of the process
+date_formatter = DateFormatter()
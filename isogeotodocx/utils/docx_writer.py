@@ -0,0 +1,299 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Write Word documents into paths or any binary stream, with a choice of
+    compression.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+import struct
+import time
+import zipfile
+import zlib
+from collections import namedtuple
+from contextlib import ExitStack
+
+# 3rd party library
+from docx.opc.constants import CONTENT_TYPE as CT
+from docx.opc.oxml import CT_Types, serialize_part_xml
+from docx.opc.packuri import CONTENT_TYPES_URI, PACKAGE_URI
+
+try:
+    # private: content types as python-docx writes them
+    from docx.opc.pkgwriter import _ContentTypesItem
+except ImportError:
+    _ContentTypesItem = None
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# zip member compressed once: source blob, CRC, size, compression and raw data
+PrecompressedMember = namedtuple(
+    "PrecompressedMember", "blob crc size compress_type data"
+)
+
+# zip local file header (see the ZIP specification): signature, versions, flags,
+# compression, time, date, CRC, sizes, name and extra field lengths
+_local_header = struct.Struct("<4s2B4HL2L2H")
+_local_header_signature = b"PK\x03\x04"
+
+# zipfile internals used to copy a compressed member as is, checked before use
+_zipfile_internals = (
+    "_lock",
+    "_writecheck",
+    "_didModify",
+    "fp",
+    "filelist",
+    "NameToInfo",
+    "start_dir",
+)
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def read_raw_member(in_zip, zinfo: zipfile.ZipInfo) -> bytes:
+    """Returns the data of a zip member as stored into the archive, without
+    decompressing it.
+
+    :param in_zip: zip file open in binary mode
+    :param zipfile.ZipInfo zinfo: member to read
+
+    :raises ValueError: if there is no local file header at the member offset
+    """
+    in_zip.seek(zinfo.header_offset)
+    header = _local_header.unpack(in_zip.read(_local_header.size))
+    if header[0] != _local_header_signature:
+        raise ValueError("Bad local header of zip member: {}".format(zinfo.filename))
+    # skip the member name and extra field of the local header
+    in_zip.seek(header[-2] + header[-1], 1)
+    return in_zip.read(zinfo.compress_size)
+
+
+def precompress_parts(
+    package, template_path=None, level: int = zlib.Z_BEST_COMPRESSION
+) -> dict:
+    """Compress the parts of a package once, to be copied as is into the documents
+    whose parts did not change (see `write_package`).
+
+    Parts identical to the template file members (media, fonts and other parts
+    loaded as raw bytes) are not even compressed: their data is read from the
+    template zip as is. Others (XML parts serialized by python-docx, slimmed
+    parts) are compressed once.
+
+    :param OpcPackage package: package (`DocxTemplate.docx.part.package`)
+    :param Path template_path: path to the .docx the package has been loaded from
+    :param int level: zlib compression level
+
+    :returns: precompressed members, by part name
+    :rtype: dict
+    """
+    members = {}
+    with ExitStack() as stack:
+        zip_in = None
+        if template_path is not None:
+            in_zip = stack.enter_context(open(str(template_path), "rb"))
+            zip_in = stack.enter_context(zipfile.ZipFile(in_zip))
+
+        for part in package.iter_parts():
+            blob = part.blob
+            crc = zlib.crc32(blob)
+
+            zinfo = data = None
+            if zip_in is not None:
+                zinfo = zip_in.NameToInfo.get(part.partname.membername)
+            if (
+                zinfo is not None
+                and zinfo.CRC == crc
+                and zinfo.file_size == len(blob)
+                and zinfo.compress_type in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)
+                and not zinfo.flag_bits & 0x1  # encrypted
+            ):
+                try:
+                    data = read_raw_member(in_zip, zinfo)
+                    compress_type = zinfo.compress_type
+                except (OSError, ValueError, struct.error) as e:
+                    logger.debug("Template member compressed again: {}".format(e))
+            if data is None:
+                compressor = zlib.compressobj(level, zlib.DEFLATED, -zlib.MAX_WBITS)
+                compress_type = zipfile.ZIP_DEFLATED
+                data = compressor.compress(blob) + compressor.flush()
+
+            members[part.partname] = PrecompressedMember(
+                blob=blob,
+                crc=crc,
+                size=len(blob),
+                compress_type=compress_type,
+                data=data,
+            )
+    return members
+
+
+def can_write_raw(zip_out: zipfile.ZipFile) -> bool:
+    """Check that the zipfile internals used by `write_member` to copy members
+    without compressing them again are available.
+
+    :param zipfile.ZipFile zip_out: archive open in write mode
+
+    :rtype: bool
+    """
+    return hasattr(zipfile.ZipInfo, "FileHeader") and all(
+        hasattr(zip_out, i) for i in _zipfile_internals
+    )
+
+
+def write_member(zip_out: zipfile.ZipFile, name: str, member: PrecompressedMember):
+    """Write a precompressed member into a zip archive, without compressing it
+    again. zipfile has no public API for it: the member is written as zipfile
+    does, except the compression. If its internals changed (see `can_write_raw`),
+    the member is written by `writestr`, compressed again.
+
+    :param zipfile.ZipFile zip_out: archive open in write mode
+    :param str name: member name
+    :param PrecompressedMember member: member data
+    """
+    zinfo = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+    zinfo.compress_type = member.compress_type
+    zinfo.external_attr = 0o600 << 16
+    if not can_write_raw(zip_out):
+        zip_out.writestr(zinfo, member.blob)
+        return
+
+    zinfo.CRC = member.crc
+    zinfo.file_size = member.size
+    zinfo.compress_size = len(member.data)
+
+    with zip_out._lock:
+        zinfo.header_offset = zip_out.fp.tell()
+        zip_out._writecheck(zinfo)
+        zip_out._didModify = True
+        zip_out.fp.write(zinfo.FileHeader(False))
+        zip_out.fp.write(member.data)
+        zip_out.filelist.append(zinfo)
+        zip_out.NameToInfo[zinfo.filename] = zinfo
+        zip_out.start_dir = zip_out.fp.tell()
+
+
+def write_package(
+    zip_out: zipfile.ZipFile,
+    package,
+    skip: tuple = (),
+    members: dict = None,
+    blobs: dict = None,
+):
+    """Write the parts of a package, their relationships and the content types
+    into a zip archive, as python-docx does.
+
+    :param zipfile.ZipFile zip_out: archive open in write mode
+    :param OpcPackage package: package to write (`DocxTemplate.docx.part.package`)
+    :param tuple skip: parts whose content is written by the caller
+    :param dict members: precompressed members (see `precompress_parts`), copied \
+    as is for parts whose content did not change. Only the other parts (rendered \
+    XML, new images) are compressed.
+    :param dict blobs: content written instead of the one of the part, by part name
+    """
+    members = members or {}
+    blobs = blobs or {}
+    parts = list(package.iter_parts())
+    zip_out.writestr(CONTENT_TYPES_URI.membername, content_types_blob(parts))
+    zip_out.writestr(PACKAGE_URI.rels_uri.membername, package.rels.xml)
+    for part in parts:
+        if part not in skip:
+            blob = blobs.get(part.partname, part.blob)
+            member = members.get(part.partname)
+            if member is not None and (blob is member.blob or blob == member.blob):
+                write_member(zip_out, part.partname.membername, member)
+            else:
+                zip_out.writestr(part.partname.membername, blob)
+        if len(part.rels):
+            zip_out.writestr(part.partname.rels_uri.membername, part.rels.xml)
+
+
+def content_types_blob(parts) -> bytes:
+    """Returns the content types item of a package, as python-docx writes it. If
+    its (private) implementation is not available, each part content type is
+    declared by name.
+
+    :param list parts: package parts
+
+    :rtype: bytes
+    """
+    if _ContentTypesItem is not None:
+        return _ContentTypesItem.from_parts(parts).blob
+
+    types = CT_Types.new()
+    types.add_default("rels", CT.OPC_RELATIONSHIPS)
+    types.add_default("xml", CT.XML)
+    for part in parts:
+        types.add_override(part.partname, part.content_type)
+    return serialize_part_xml(types)
+
+
+def save_docx(docx_template, out_docx, compress: bool = True):
+    """Save a rendered template into a path or a writable binary stream.
+
+    Without compression (ZIP_STORED), saving takes almost no CPU but the document is
+    bigger: suitable to stream it over a compressed connection or to store it
+    into an archive compressed afterwards.
+
+    Templates from a TemplateCache only compress their rendered parts: the others
+    are copied as compressed once by the cache (see `precompress_parts`). Media
+    replaced by `replace_media` or `replace_embedded` are written in place of the
+    original ones, with the same compression.
+
+    :param DocxTemplate docx_template: rendered template
+    :param out_docx: output path or writable binary file object
+    :param bool compress: compress (deflate) the zip members
+    """
+    members = None
+    source = getattr(docx_template, "source", None)
+    if compress and source is not None:
+        members = source.precompressed()
+
+    docx_template.pre_processing()
+    package = docx_template.docx.part.package
+    for part in package.parts:
+        part.before_marshal()
+
+    compression = zipfile.ZIP_DEFLATED if compress else zipfile.ZIP_STORED
+    with zipfile.ZipFile(out_docx, "w", compression=compression) as zip_out:
+        write_package(
+            zip_out, package, members=members, blobs=replaced_media(docx_template)
+        )
+
+
+def replaced_media(docx_template) -> dict:
+    """Returns the media and embedded objects replaced by `replace_media` and
+    `replace_embedded`, matched by CRC as docxtpl does when saving.
+
+    :param DocxTemplate docx_template: template
+
+    :returns: new content by part name
+    :rtype: dict
+    """
+    replaced = {}
+    if not (docx_template.crc_to_new_media or docx_template.crc_to_new_embedded):
+        return replaced
+
+    for part in docx_template.docx.part.package.iter_parts():
+        if part.partname.startswith("/word/media/"):
+            new_blobs = docx_template.crc_to_new_media
+        elif part.partname.startswith("/word/embeddings/"):
+            new_blobs = docx_template.crc_to_new_embedded
+        else:
+            continue
+        blob = new_blobs.get(zlib.crc32(part.blob))
+        if blob is not None:
+            replaced[part.partname] = blob
+    return replaced
@@ -20,25 +20,45 @@
 # Standard library
 import logging
 import re
-from itertools import zip_longest
-from xml.sax.saxutils import escape  # '<' -> '&lt;'
 
 # 3rd party library
-from isogeo_pysdk import (
-    Condition,
-    Conformity,
-    Directive,
-    IsogeoTranslator,
-    IsogeoUtils,
-    Limitation,
-)
+from isogeo_pysdk import Condition, Conformity, Directive, Limitation
+
+# submodules
+from .dates import DateFormatter, date_formatter as default_date_formatter
+from .translations import get_translation_table
 
 # ##############################################################################
 # ############ Globals ############
 # #################################
 
 logger = logging.getLogger("isogeotodocx")  # LOG
-utils = IsogeoUtils()
+
+# XML grammar used to clean strings, built once. Assumptions:
+#   doc = *( start_tag / end_tag / text )
+#   start_tag = '<' name *attr [ '/' ] '>'
+#   end_tag = '<' '/' name '>'
+_ws = r"[ \t\r\n]*"  # allow ws between any token
+# note: expand if necessary but the stricter the better
+_name = "[a-zA-Z]+"
+# note: fragile against missing '"'; no "'"
+_attr = '{name} {ws} = {ws} "[^"]*"'.format(name=_name, ws=_ws)
+_start_tag = "< {ws} {name} {ws} (?:{attr} {ws})* /? {ws} >".format(
+    name=_name, ws=_ws, attr=_attr
+)
+_end_tag = _ws.join(["<", "/", _name, ">"])
+# a valid tag is kept as is, any other special char is escaped
+_xml_tag_or_char_regex = re.compile(
+    "({} | {}) | [&<>]".format(_start_tag, _end_tag), flags=re.VERBOSE
+)
+_xml_any_tag_regex = re.compile(r"<.*?>")
+_xml_entities = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+
+
+def _escape_xml_match(match) -> str:
+    """Substitution callback: keep tags, escape special chars."""
+    return match.group(1) or _xml_entities[match.group(0)]
+
 
 # ##############################################################################
 # ########## Classes ###############
@@ -49,9 +69,11 @@ class Formatter(object):
     """Metadata formatter to avoid repeat operations on metadata during export in different formats.
 
     :param str lang: selected language
+    :param DateFormatter date_formatter: dates formatter. Defaults to the one shared \
+    by the process.
     """
 
-    def __init__(self, lang="FR"):
+    def __init__(self, lang="FR", date_formatter: DateFormatter = None):
         # locale
         self.lang = lang.lower()
         if lang.lower() == "fr":
@@ -64,7 +86,8 @@ class Formatter(object):
             self.locale_fmt = "uk_UK"
 
         # store params and imports as attributes
-        self.isogeo_tr = IsogeoTranslator(lang).tr
+        self.isogeo_tr = get_translation_table(lang).tr
+        self.date_formatter = date_formatter or default_date_formatter
 
     # ------------ Metadata sections formatter --------------------------------
     def conditions(self, md_conditions: list) -> list:
@@ -157,9 +180,9 @@ class Formatter(object):
             spec["link"] = conf_in.specification.link
             # publication date
             if conf_in.specification.published:
-                spec["published"] = utils.hlpr_datetimes(
-                    conf_in.specification.published
-                ).strftime(self.dates_fmt)
+                spec["published"] = self.date_formatter.format(
+                    conf_in.specification.published, self.dates_fmt
+                )
             else:
                 spec["published"] = ""
 
@@ -187,37 +210,31 @@ class Formatter(object):
         if not isinstance(invalid_xml, str):
             return invalid_xml
 
-        # assumptions:
-        #   doc = *( start_tag / end_tag / text )
-        #   start_tag = '<' name *attr [ '/' ] '>'
-        #   end_tag = '<' '/' name '>'
-        ws = r"[ \t\r\n]*"  # allow ws between any token
-        # note: expand if necessary but the stricter the better
-        name = "[a-zA-Z]+"
-        # note: fragile against missing '"'; no "'"
-        attr = '{name} {ws} = {ws} "[^"]*"'
-        start_tag = "< {ws} {name} {ws} (?:{attr} {ws})* /? {ws} >"
-        end_tag = "{ws}".join(["<", "/", "{name}", ">"])
-        tag = "{start_tag} | {end_tag}"
-
-        assert "{{" not in tag
-        while "{" in tag:  # unwrap definitions
-            tag = tag.format(**vars())
-
-        tag_regex = re.compile("(%s)" % tag, flags=re.VERBOSE)
-
-        # escape &, <, > in the text
-        iters = [iter(tag_regex.split(invalid_xml))] * 2
-        pairs = zip_longest(*iters, fillvalue="")  # iterate 2 items at a time
-
-        # get the clean version
-        clean_version = "".join(escape(text) + tag for text, tag in pairs)
+        # fast path: nothing to escape nor to substitute
+        if not ("<" in invalid_xml or ">" in invalid_xml or "&" in invalid_xml):
+            return invalid_xml
+
+        # escape &, <, > in the text but keep valid tags
+        clean_version = _xml_tag_or_char_regex.sub(_escape_xml_match, invalid_xml)
+
         if mode == "strict":
-            clean_version = re.sub(r"<.*?>", substitute, clean_version)
-        else:
-            pass
+            clean_version = _xml_any_tag_regex.sub(substitute, clean_version)
         return clean_version
 
+    def clean_xml_batch(
+        self, invalid_xmls: list, mode: str = "soft", substitute: str = "_"
+    ) -> list:
+        """Clean a list of strings of XML invalid characters. See `clean_xml`.
+
+        :param list invalid_xmls: xml strings to clean
+        :param str mode: mode to apply: soft [default] or strict
+        :param str substitute: character to use for subtistution of special chars
+
+        :rtype: list
+        """
+        clean_xml = self.clean_xml
+        return [clean_xml(i, mode, substitute) for i in invalid_xmls]
+
 
 # ###############################################################################
 # ###### Stand alone program ########
@@ -0,0 +1,153 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    On-disk manifest of exported metadatas, used to skip unchanged ones.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import hashlib
+import logging
+import sqlite3
+from pathlib import Path
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def hash_file(in_path: Path, chunk_size: int = 1048576) -> str:
+    """Returns the SHA-256 hexdigest of a file content.
+
+    :param Path in_path: path to the file to hash
+    :param int chunk_size: number of bytes read at once
+    """
+    file_hash = hashlib.sha256()
+    with Path(in_path).open("rb") as in_file:
+        for chunk in iter(lambda: in_file.read(chunk_size), b""):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class ExportManifest(object):
+    """SQLite manifest of exported metadatas, keyed by metadata UUID. It stores what
+    the output depends on: metadata modification date, template hash, thumbnail
+    modification time, output path and exporter options hash.
+
+    :param Path db_path: path to the SQLite database. Created if it does not exist.
+    :param int commit_every: number of records between two commits
+    """
+
+    def __init__(self, db_path: Path, commit_every: int = 100):
+        self.db_path = Path(db_path)
+        self.commit_every = commit_every
+        self._uncommitted = 0
+
+        self.conn = sqlite3.connect(str(self.db_path))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS exports ("
+            "md_id TEXT PRIMARY KEY, "
+            "md_modified TEXT, "
+            "template_hash TEXT, "
+            "thumbnail_mtime REAL, "
+            "out_path TEXT, "
+            "options_hash TEXT)"
+        )
+        # manifests written by previous versions: their records never match
+        columns = [i[1] for i in self.conn.execute("PRAGMA table_info(exports)")]
+        if "options_hash" not in columns:
+            self.conn.execute("ALTER TABLE exports ADD COLUMN options_hash TEXT")
+        self.conn.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.conn.execute("SELECT COUNT(*) FROM exports").fetchone()[0]
+
+    def lookup(self, state: dict) -> str:
+        """Returns the output path of a previous export matching the state, if the
+        output file still exists. The output path must be the one of the state:
+        a metadata exported elsewhere is exported again.
+
+        :param dict state: export state, as returned by Isogeo2docx.export_state
+
+        :returns: path to the up-to-date output or None if the metadata must be exported
+        :rtype: str
+        """
+        row = self.conn.execute(
+            "SELECT md_modified, template_hash, thumbnail_mtime, options_hash, "
+            "out_path FROM exports WHERE md_id = ?",
+            (state.get("_id"),),
+        ).fetchone()
+        if row is None:
+            return None
+
+        if row[:4] != (
+            state.get("_modified"),
+            state.get("template_hash"),
+            state.get("thumbnail_mtime"),
+            state.get("options_hash"),
+        ):
+            return None
+
+        out_path = row[4]
+        if not out_path or not Path(out_path).is_file():
+            return None
+        # both resolved
+        if state.get("out_path") is not None and out_path != state.get("out_path"):
+            return None
+
+        return out_path
+
+    def record(self, state: dict, out_path: str):
+        """Store the state of an exported metadata.
+
+        :param dict state: export state, as returned by Isogeo2docx.export_state
+        :param str out_path: path to the output file
+        """
+        self.conn.execute(
+            "INSERT OR REPLACE INTO exports (md_id, md_modified, template_hash, "
+            "thumbnail_mtime, out_path, options_hash) VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                state.get("_id"),
+                state.get("_modified"),
+                state.get("template_hash"),
+                state.get("thumbnail_mtime"),
+                str(Path(out_path).resolve()),
+                state.get("options_hash"),
+            ),
+        )
+        self._uncommitted += 1
+        if self._uncommitted >= self.commit_every:
+            self.commit()
+
+    def commit(self):
+        """Write pending records to disk."""
+        self.conn.commit()
+        self._uncommitted = 0
+
+    def close(self):
+        """Commit and close the database connection."""
+        self.commit()
+        self.conn.close()
+        logger.debug("Export manifest closed: {}".format(self.db_path))
@@ -0,0 +1,99 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Slim the media of a template package once, before documents are generated from
+    it: embedded fonts, unused and oversized images.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+import re
+
+# 3rd party library
+from docx.opc.constants import RELATIONSHIP_TYPE as RT
+from docx.oxml.ns import qn
+from docx.parts.image import ImagePart
+
+# submodules
+from .thumbnails import ThumbnailCache
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# fonts embedding, in the fonts table and in the document settings
+_font_embed_regex = re.compile(rb"<w:embed(?:Regular|Bold|Italic|BoldItalic)\b[^>]*/>")
+_font_settings = ("w:embedTrueTypeFonts", "w:embedSystemFonts", "w:saveSubsetFonts")
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def _parts_size(package) -> int:
+    return sum(len(part.blob) for part in package.iter_parts())
+
+
+def slim_package(package, embed_fonts: bool = True, max_image_width: int = None) -> int:
+    """Remove from a package what generated documents do not need: images not
+    referenced by any part and, optionally, embedded fonts and oversized images.
+
+    :param OpcPackage package: package to slim (`DocxTemplate.docx.part.package`)
+    :param bool embed_fonts: keep the fonts embedded into the template. If False, \
+    they are dropped and documents use the fonts installed where they are opened.
+    :param int max_image_width: maximum width in pixels of the template images. \
+    Larger ones are downsized and recompressed. Requires Pillow. Images in formats \
+    it can not read are kept as is.
+
+    :returns: number of bytes removed from the package parts
+    :rtype: int
+    """
+    size = _parts_size(package)
+
+    for part in list(package.iter_parts()):
+        blob = None
+        for rel_id, rel in list(part.rels.items()):
+            if rel.is_external:
+                continue
+            # embedded fonts
+            if rel.reltype == RT.FONT and not embed_fonts:
+                del part.rels[rel_id]
+                continue
+            # images referenced by the relationships only
+            if rel.reltype == RT.IMAGE:
+                blob = blob or part.blob
+                if '"{}"'.format(rel_id).encode() not in blob:
+                    del part.rels[rel_id]
+
+    if not embed_fonts:
+        for part in package.iter_parts():
+            if part.partname.endswith("/fontTable.xml"):
+                part._blob = _font_embed_regex.sub(b"", part.blob)
+            elif part.partname.endswith("/settings.xml"):
+                for tag in _font_settings:
+                    for element in part.element.findall(qn(tag)):
+                        part.element.remove(element)
+
+    if max_image_width:
+        images = ThumbnailCache(max_width=max_image_width)
+        for part in package.iter_parts():
+            if isinstance(part, ImagePart):
+                try:
+                    part._blob = images.process(part.blob, part.partname)[0]
+                except Exception as e:
+                    # formats unknown to python-docx or Pillow (EMF, WMF...)
+                    logger.warning(
+                        "Template image kept as is: {}. {}".format(part.partname, e)
+                    )
+
+    removed = size - _parts_size(package)
+    logger.info("Template package slimmed: {} bytes removed.".format(removed))
+    return removed
@@ -0,0 +1,243 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Optional timing of the export stages, with per-record durations, aggregated
+    histograms and periodic profiling.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import cProfile
+import logging
+import tracemalloc
+from functools import wraps
+from pathlib import Path
+from time import perf_counter
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# upper bounds (seconds) of the histograms buckets, the last one being unbounded
+_buckets_bounds = (0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5)
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class _StageTimer(object):
+    """Context manager adding the time spent in its block to a stage of the current
+    record."""
+
+    __slots__ = ("metrics", "name", "start")
+
+    def __init__(self, metrics, name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = perf_counter()
+        return self
+
+    def __exit__(self, *args):
+        self.metrics.add_duration(self.name, perf_counter() - self.start)
+
+
+class ExportMetrics(object):
+    """Collect the duration of each export stage by record: template load, context \
+    building, XML cleaning, dates formatting, thumbnail insertion, rendering, saving.
+
+    Pass it to Isogeo2docx to enable instrumentation. Without it, nothing is measured.
+
+    :param callable callback: called at the end of each record with the metadata UUID \
+    and its stages durations (seconds): `callback(md_id, {"render": 0.05, ...})`
+    :param int profile_every: profile one record out of N with cProfile
+    :param Path profile_dir: folder where profiles are dumped. Defaults to current one.
+    :param bool trace_memory: also dump a tracemalloc snapshot of profiled records
+
+    :Example:
+
+    .. code-block:: python
+
+        metrics = ExportMetrics(callback=lambda md_id, timings: print(md_id, timings))
+        toDocx = Isogeo2docx(metrics=metrics)
+        for status in toDocx.export_many(template_path, metadatas, out_dir):
+            pass
+        print(metrics.summary())
+    """
+
+    def __init__(
+        self,
+        callback=None,
+        profile_every: int = None,
+        profile_dir: Path = None,
+        trace_memory: bool = False,
+    ):
+        self.callback = callback
+        self.profile_every = profile_every
+        self.profile_dir = Path(profile_dir or ".")
+        self.trace_memory = trace_memory
+
+        self.records = 0
+        self.histograms = {}
+        self._current = {}
+        self._profiler = None
+
+    def worker_copy(self):
+        """Returns an empty copy, without callback, to be used in worker processes.
+        Their records are sent back to this instance with `add_record`."""
+        return ExportMetrics(
+            profile_every=self.profile_every,
+            profile_dir=self.profile_dir,
+            trace_memory=self.trace_memory,
+        )
+
+    # -- Measures ----------------------------------------------------------------
+    def stage(self, name: str) -> _StageTimer:
+        """Returns a context manager measuring the time spent in a stage.
+
+        :param str name: stage name
+        """
+        return _StageTimer(self, name)
+
+    def timed(self, name: str, func):
+        """Wrap a function to add the time spent in its calls to a stage.
+
+        :param str name: stage name
+        :param callable func: function to measure
+        """
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            start = perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add_duration(name, perf_counter() - start)
+
+        return wrapper
+
+    def add_duration(self, name: str, duration: float):
+        """Add a duration to a stage of the current record.
+
+        :param str name: stage name
+        :param float duration: seconds
+        """
+        self._current[name] = self._current.get(name, 0) + duration
+
+    # -- Records -----------------------------------------------------------------
+    def begin_record(self):
+        """Start a record, profiling it if it is its turn."""
+        self._current = {}
+        if not self.profile_every or self.records % self.profile_every:
+            return
+
+        if self.trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self._profiler = cProfile.Profile()
+        self._profiler.enable()
+
+    def end_record(self, md_id: str) -> dict:
+        """End the current record: aggregate its durations, dump its profile if any
+        and call the callback.
+
+        :param str md_id: metadata UUID
+
+        :returns: stages durations of the record
+        :rtype: dict
+        """
+        if self._profiler is not None:
+            self._profiler.disable()
+            self._dump_profile(md_id)
+
+        timings = self._current
+        self._current = {}
+        self.add_record(md_id, timings)
+        return timings
+
+    def add_record(self, md_id: str, timings: dict):
+        """Aggregate the stages durations of a record (e.g. measured in a worker
+        process) and call the callback.
+
+        :param str md_id: metadata UUID
+        :param dict timings: stages durations (seconds)
+        """
+        self.records += 1
+        for name, duration in timings.items():
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = {
+                    "count": 0,
+                    "total": 0,
+                    "max": 0,
+                    "buckets": [0] * (len(_buckets_bounds) + 1),
+                }
+            histogram["count"] += 1
+            histogram["total"] += duration
+            histogram["max"] = max(histogram.get("max"), duration)
+            bucket = 0
+            while bucket < len(_buckets_bounds) and duration > _buckets_bounds[bucket]:
+                bucket += 1
+            histogram["buckets"][bucket] += 1
+
+        if self.callback is not None:
+            self.callback(md_id, timings)
+
+    def _dump_profile(self, md_id: str):
+        """Write the profile (and memory snapshot) of the current record."""
+        self.profile_dir.mkdir(parents=True, exist_ok=True)
+        out_base = self.profile_dir / "isogeo2docx_{:06d}_{}".format(
+            self.records, md_id
+        )
+        self._profiler.dump_stats(str(out_base.with_suffix(".prof")))
+        self._profiler = None
+
+        if self.trace_memory and tracemalloc.is_tracing():
+            tracemalloc.take_snapshot().dump(str(out_base.with_suffix(".tracemalloc")))
+            tracemalloc.stop()
+
+        logger.debug("Profile of {} dumped: {}.prof".format(md_id, out_base))
+
+    # -- Results -----------------------------------------------------------------
+    def summary(self) -> dict:
+        """Returns aggregated durations by stage: count, total, mean, max and \
+        histogram (number of records by duration bucket).
+
+        :rtype: dict
+        """
+        bounds = ["<={}s".format(i) for i in _buckets_bounds]
+        bounds.append(">{}s".format(_buckets_bounds[-1]))
+        return {
+            name: {
+                "count": histogram.get("count"),
+                "total": histogram.get("total"),
+                "mean": histogram.get("total") / histogram.get("count"),
+                "max": histogram.get("max"),
+                "histogram": dict(zip(bounds, histogram.get("buckets"))),
+            }
+            for name, histogram in self.histograms.items()
+        }
+
+    def log_summary(self):
+        """Log aggregated durations by stage."""
+        for name, stage in sorted(
+            self.summary().items(), key=lambda i: i[1].get("total"), reverse=True
+        ):
+            logger.info(
+                "Stage {}: {:.3f}s total, {:.4f}s mean, {:.4f}s max "
+                "over {} records".format(
+                    name,
+                    stage.get("total"),
+                    stage.get("mean"),
+                    stage.get("max"),
+                    stage.get("count"),
+                )
+            )
@@ -0,0 +1,165 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Documents stored by content hash of what they have been rendered from, so that
+    identical sheets (reimported series, metadatas shared in several workgroups...)
+    are rendered only once.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import hashlib
+import json
+import logging
+import os
+import shutil
+from pathlib import Path
+from uuid import uuid4
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class RenderCache(object):
+    """Content-addressed store of rendered documents: the key is a hash of the
+    normalized template context, the template hash and the rendering options.
+    On a hit, the document is hard-linked (or copied) instead of being rendered.
+
+    The cache can be shared by processes: entries are written atomically.
+
+    By default, only the export date is left out of the key. Variables unique to
+    each metadata (edit and OpenCatalog links, metadata dates: `RECORD_VARIABLES`)
+    are part of it: only re-exports of the same metadata hit the cache. Different
+    metadatas with the same content (reimported series, metadatas copied into
+    several workgroups) share documents only if these variables are ignored too,
+    at the cost of links and dates of the first metadata rendered.
+
+    :param Path cache_dir: folder where documents are stored. Created if needed.
+    :param tuple ignore_variables: variables left out of the key. By default the \
+    export date (`varMdDtExp`), otherwise two exports never match. Documents taken \
+    from the cache keep the values of their first rendering for these variables. \
+    Pass an empty tuple to key on the whole context.
+    :param bool link: hard-link documents from and into the cache when possible, \
+    instead of copying them. Linked documents must not be modified in place.
+
+    :Example:
+
+    .. code-block:: python
+
+        # documents shared by metadatas with the same content
+        cache = RenderCache(
+            "_cache/documents",
+            ignore_variables=("varMdDtExp",) + RenderCache.RECORD_VARIABLES,
+        )
+    """
+
+    # variables unique to each metadata
+    RECORD_VARIABLES = ("varEditAPP", "varViewOC", "varMdDtCrea", "varMdDtUpda")
+
+    def __init__(
+        self,
+        cache_dir: Path,
+        ignore_variables: tuple = ("varMdDtExp",),
+        link: bool = True,
+    ):
+        self.cache_dir = Path(cache_dir)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ignore_variables = tuple(ignore_variables)
+        self.link = link
+
+    def key(self, context: dict, template_hash: str, options: tuple = ()) -> str:
+        """Returns the key of a rendering.
+
+        :param dict context: template context, as returned by `build_context`
+        :param str template_hash: hash of the template file
+        :param tuple options: other parameters changing the document
+
+        :rtype: str
+        """
+        normalized = dict(context)
+        for variable in self.ignore_variables:
+            normalized.pop(variable, None)
+        # image content may change under the same path
+        thumbnail = normalized.get("varThumbnail")
+        if isinstance(thumbnail, str):
+            try:
+                stat = os.stat(thumbnail)
+                normalized["varThumbnail"] = (thumbnail, stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                pass
+
+        content = json.dumps(
+            [template_hash, list(options), normalized],
+            sort_keys=True,
+            separators=(",", ":"),
+            ensure_ascii=False,
+            default=str,
+        )
+        return hashlib.sha256(content.encode("UTF-8")).hexdigest()
+
+    def path(self, key: str) -> Path:
+        """Path of the document stored for a key."""
+        return self.cache_dir / key[:2] / "{}.docx".format(key)
+
+    def restore(self, key: str, out_path: Path) -> bool:
+        """Put the document stored for a key at the output path, if any.
+
+        :param str key: rendering key (see `key`)
+        :param Path out_path: output path, replaced if it exists
+
+        :returns: True on a cache hit
+        :rtype: bool
+        """
+        cached_path = self.path(key)
+        if not cached_path.is_file():
+            return False
+        try:
+            self._place(cached_path, Path(out_path))
+        except OSError as e:
+            logger.warning("Cached document can't be used: {}. {}".format(key, e))
+            return False
+        logger.debug("Document taken from the render cache: {}".format(out_path))
+        return True
+
+    def store(self, key: str, out_path: Path):
+        """Store a rendered document into the cache.
+
+        :param str key: rendering key (see `key`)
+        :param Path out_path: path to the rendered document
+        """
+        cached_path = self.path(key)
+        try:
+            cached_path.parent.mkdir(exist_ok=True)
+            self._place(Path(out_path), cached_path)
+        except OSError as e:
+            logger.warning("Document can't be cached: {}. {}".format(out_path, e))
+
+    def _place(self, src_path: Path, dst_path: Path):
+        """Link or copy a file through a temporary file, replacing the destination
+        at once."""
+        tmp_path = dst_path.with_name(".{}.{}.tmp".format(dst_path.name, uuid4().hex))
+        try:
+            if self.link:
+                try:
+                    os.link(str(src_path), str(tmp_path))
+                except OSError:
+                    # other file system or no hard links support
+                    shutil.copyfile(str(src_path), str(tmp_path))
+            else:
+                shutil.copyfile(str(src_path), str(tmp_path))
+            os.replace(str(tmp_path), str(dst_path))
+        finally:
+            if tmp_path.exists():
+                tmp_path.unlink()
@@ -0,0 +1,194 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Stream metadatas from a search dump without loading the whole file in memory.
+
+    Supported inputs, plain or gzipped (detected from content):
+
+    - JSON search response as stored by `tests/fixturing.py`: `{"results": [...], ...}`
+    - JSON list of metadatas: `[{...}, {...}]`
+    - JSON Lines: one metadata per line
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import gzip
+import io
+import json
+import logging
+from pathlib import Path
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+_decoder = json.JSONDecoder()
+_whitespaces = " \t\n\r"
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class _JsonStream(object):
+    """Text buffer refilled from a file object, to decode JSON values one by one.
+
+    :param file_obj: text file object
+    :param int chunk_size: number of characters read at each refill
+    """
+
+    def __init__(self, file_obj, chunk_size: int = 65536):
+        self.file_obj = file_obj
+        self.chunk_size = chunk_size
+        self.buf = ""
+        self.pos = 0
+        self.eof = False
+
+    def _refill(self, size: int) -> bool:
+        """Read more characters, dropping the ones already consumed."""
+        if self.eof:
+            return False
+        chunk = self.file_obj.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos :] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Returns the next non-whitespace char without consuming it ('' at EOF)."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _whitespaces:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._refill(self.chunk_size):
+                return ""
+
+    def expect(self, char: str):
+        """Consume the next non-whitespace char which must be the one expected."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(
+                "Invalid search dump: expected '{}', got '{}'.".format(char, found)
+            )
+        self.pos += 1
+
+    def decode(self):
+        """Decode the next JSON value, reading more data while it is incomplete."""
+        self.peek()
+        size = self.chunk_size
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                # value is probably truncated: read more, bigger and bigger chunks
+                if not self._refill(size):
+                    raise
+                size *= 2
+                continue
+            # a number at the end of the buffer may be truncated too
+            if end == len(self.buf) and not self.eof and self._refill(size):
+                continue
+            self.pos = end
+            return value
+
+    def iter_array(self):
+        """Yield the values of the JSON array starting at current position."""
+        self.expect("[")
+        if self.peek() == "]":
+            self.pos += 1
+            return
+        while True:
+            yield self.decode()
+            if self.peek() == ",":
+                self.pos += 1
+                continue
+            self.expect("]")
+            return
+
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def _open_text(in_path: Path):
+    """Open a file as UTF-8 text, decompressing it on the fly if it is gzipped."""
+    with in_path.open("rb") as bin_file:
+        magic = bin_file.read(2)
+    if magic == b"\x1f\x8b":
+        return io.TextIOWrapper(gzip.open(str(in_path), "rb"), encoding="utf-8")
+    return in_path.open("r", encoding="utf-8")
+
+
+def _iter_metadatas(stream: _JsonStream):
+    """Yield metadatas from the stream, whatever the dump structure."""
+    first = stream.peek()
+
+    # JSON list of metadatas
+    if first == "[":
+        yield from stream.iter_array()
+        return
+
+    if first != "{":
+        if first:
+            raise ValueError("Invalid search dump: unexpected '{}'.".format(first))
+        return
+
+    # search response (streaming its results) or first metadata of JSON Lines
+    stream.expect("{")
+    head = {}
+    is_search = False
+    while stream.peek() != "}":
+        key = stream.decode()
+        stream.expect(":")
+        if key == "results" and stream.peek() == "[":
+            is_search = True
+            yield from stream.iter_array()
+        else:
+            head[key] = stream.decode()
+        if stream.peek() == ",":
+            stream.pos += 1
+    stream.expect("}")
+
+    # JSON Lines: the first object was a whole metadata, others follow
+    if not is_search:
+        yield head
+        while stream.peek():
+            yield stream.decode()
+
+
+def iter_search_results(in_path: Path, chunk_size: int = 65536):
+    """Yield metadatas (raw API dictionaries) one by one from a search dump.
+
+    Only one metadata at a time is held in memory, so the result can be passed as is
+    to `Isogeo2docx.export_many`.
+
+    :param Path in_path: path to the search dump (.json, .jsonl, optionally gzipped)
+    :param int chunk_size: number of characters read at once
+
+    :Example:
+
+    .. code-block:: python
+
+        for md in iter_search_results("tests/fixtures/api_search_complete.json"):
+            metadata = Metadata.clean_attributes(md)
+    """
+    in_path = Path(in_path)
+    count = 0
+
+    with _open_text(in_path) as in_file:
+        for md in _iter_metadatas(_JsonStream(in_file, chunk_size=chunk_size)):
+            count += 1
+            yield md
+
+    logger.debug("{} metadatas read from {}".format(count, in_path))
@@ -0,0 +1,500 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Parse a Word template once and hand out cheap per-metadata copies.
+
+    Patched XML and compiled Jinja code can be stored into an artifact next to the
+    template (see `precompile_template`), so next processes skip these steps.
+    Artifacts hold code run at rendering: they are only loaded on demand
+    (`use_artifact`), from template folders writable by trusted users only.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import json
+import logging
+import marshal
+import re
+import sys
+from copy import deepcopy
+from functools import partial
+from pathlib import Path
+from threading import Lock
+
+# 3rd party library
+import docxtpl
+import jinja2
+from docxtpl import DocxTemplate
+from jinja2 import Environment, meta
+from markupsafe import Markup, escape
+
+# submodules
+from .docx_writer import precompress_parts, save_docx
+from .manifest import hash_file
+from .media import slim_package
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# compiled code can only be loaded by the same versions
+_artifact_version = 3
+# artifact file: magic, JSON header line, then marshalled data
+_artifact_magic = b"ISOGEO2DOCX-ARTIFACT\n"
+
+# table rows repeated by a loop only printing attributes of its item, rendered
+# without Jinja (see TemplateCache.render_rows)
+_row_loop_regex = re.compile(
+    r"\{%\s*for (\w+) in (\w+)\s*%\}"
+    r"(<w:tr[ >](?:(?!\{%).)*?</w:tr>)"
+    r"\s*\{%\s*endfor\s*%\}",
+    re.DOTALL,
+)
+_row_expression_regex = re.compile(r"\{\{\s*(\w+)\.(\w+)\s*\}\}")
+# editing marks repeated in each row: revision ids and spelling/grammar state
+_row_marks_regex = re.compile(r' w:rsid\w*="[^"]*"|<w:proofErr [^>]*/>')
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class CachedDocxTemplate(DocxTemplate):
+    """DocxTemplate built from an already parsed document, rendering with the Jinja
+    templates compiled once by its TemplateCache.
+
+    :param Document docx: private copy of the parsed template document
+    :param TemplateCache source: cache entry which owns the compiled templates
+    """
+
+    def __init__(self, docx, source):
+        # do not call DocxTemplate.__init__: it would parse the file again
+        self.docx = docx
+        self.crc_to_new_media = {}
+        self.crc_to_new_embedded = {}
+        self.pic_to_replace = {}
+        self.pic_map = {}
+        self.source = source
+
+    def render(self, context: dict, jinja_env: Environment = None, autoescape=False):
+        """Render the context into the document. Same signature as DocxTemplate.render.
+
+        A custom Jinja environment can not reuse the compiled templates, so it falls
+        back on the regular (slower) docxtpl rendering.
+        """
+        if jinja_env is not None:
+            return super(CachedDocxTemplate, self).render(
+                context, jinja_env=jinja_env, autoescape=autoescape
+            )
+
+        _, headers_footers = self.source.compiled(autoescape)
+
+        # body
+        tree = self.fix_tables(self.source.render_body(context, autoescape))
+        self.map_tree(tree)
+
+        # headers and footers
+        for rel_key, encoding, template in headers_footers:
+            xml = self.source.render_compiled(template, context)
+            self.map_headers_footers_xml(rel_key, xml.encode(encoding))
+
+    def save(self, filename, *args, **kwargs):
+        """Save the document, with the binary parts compressed once by the cache
+        (see `save_docx`)."""
+        save_docx(self, filename)
+
+
+class TemplateCache(object):
+    """Word template parsed, patched and compiled once.
+
+    :param Path template_path: path to the .docx template
+    :param bool use_artifact: load the precompiled artifact of the template, if any. \
+    It contains code run at rendering: only enable it if the template folder can not \
+    be written by untrusted users.
+    :param bool embed_fonts: keep the fonts embedded into the template. See \
+    `slim_package`.
+    :param int max_image_width: maximum width in pixels of the template images. \
+    See `slim_package`.
+    """
+
+    def __init__(
+        self,
+        template_path: Path,
+        use_artifact: bool = False,
+        embed_fonts: bool = True,
+        max_image_width: int = None,
+    ):
+        self.path = Path(template_path).resolve()
+        stat = self.path.stat()
+        self.signature = (stat.st_mtime_ns, stat.st_size)
+        self.template_hash = hash_file(self.path)
+
+        # parse the package only once, without what documents do not need
+        self.pristine = DocxTemplate(str(self.path))
+        if not embed_fonts or max_image_width:
+            slim_package(
+                self.pristine.docx.part.package,
+                embed_fonts=embed_fonts,
+                max_image_width=max_image_width,
+            )
+        # parts compressed at first save
+        self._members = None
+
+        # compiled Jinja templates and their code, by autoescape mode
+        self._compiled = {}
+        self._codes = {}
+        self._variables = None
+        self._lock = Lock()
+
+        artifact = self._load_artifact() if use_artifact else None
+        if artifact is not None:
+            self.body_xml = artifact.get("body_xml")
+            self.headers_footers_xml = artifact.get("headers_footers_xml")
+            self.rows = artifact.get("rows")
+            self._codes = {
+                autoescape: (
+                    marshal.loads(body),
+                    [marshal.loads(i) for i in headers_footers],
+                )
+                for autoescape, (body, headers_footers) in artifact.get(
+                    "codes"
+                ).items()
+            }
+            logger.debug("Template loaded from its artifact: {}".format(self.path))
+            return
+
+        # patch the XML only once (merged runs, cleaned Jinja tags...)
+        self.body_xml, self.rows = compact_rows(
+            self.pristine.patch_xml(self.pristine.get_xml())
+        )
+        self.headers_footers_xml = []
+        for uri in (DocxTemplate.HEADER_URI, DocxTemplate.FOOTER_URI):
+            for rel_key, xml in self.pristine.get_headers_footers_xml(uri):
+                encoding = self.pristine.get_headers_footers_encoding(xml)
+                self.headers_footers_xml.append(
+                    (rel_key, encoding, self.pristine.patch_xml(xml))
+                )
+
+        logger.debug("Template parsed and cached: {}".format(self.path))
+
+    @property
+    def artifact_path(self) -> Path:
+        """Path of the precompiled artifact, next to the template and named after its
+        content hash."""
+        return self.path.with_name(
+            "{}.{}.precompiled".format(self.path.name, self.template_hash[:16])
+        )
+
+    @staticmethod
+    def _artifact_versions() -> tuple:
+        return (
+            _artifact_version,
+            tuple(sys.version_info[:2]),
+            jinja2.__version__,
+            getattr(docxtpl, "__version__", None),
+        )
+
+    def _artifact_header(self) -> dict:
+        """Returns the artifact header, as read back from JSON."""
+        return json.loads(
+            json.dumps(
+                {
+                    "versions": self._artifact_versions(),
+                    "template_hash": self.template_hash,
+                }
+            )
+        )
+
+    def _load_artifact(self) -> dict:
+        """Returns the content of the template artifact if it exists and matches the
+        template and the current versions. The header is checked before the content
+        is deserialized (with marshal: plain data and code objects, never run
+        there)."""
+        try:
+            with self.artifact_path.open("rb") as in_artifact:
+                if in_artifact.read(len(_artifact_magic)) != _artifact_magic:
+                    raise ValueError("not an artifact")
+                header = json.loads(in_artifact.readline().decode("UTF-8"))
+                if header != self._artifact_header():
+                    logger.info(
+                        "Template artifact ignored, made by other versions: {}".format(
+                            self.artifact_path
+                        )
+                    )
+                    return None
+                artifact = marshal.load(in_artifact)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(
+                "Template artifact can't be read: {}. {}".format(self.artifact_path, e)
+            )
+            return None
+
+        return artifact
+
+    def save_artifact(self) -> Path:
+        """Write the patched XML and the compiled Jinja code (autoescape mode) into
+        the template artifact.
+
+        :returns: path to the artifact
+        :rtype: Path
+        """
+        self.compiled(True)
+        artifact = {
+            "body_xml": self.body_xml,
+            "headers_footers_xml": self.headers_footers_xml,
+            "rows": self.rows,
+            "codes": {
+                autoescape: (
+                    marshal.dumps(body),
+                    [marshal.dumps(i) for i in headers_footers],
+                )
+                for autoescape, (body, headers_footers) in self._codes.items()
+            },
+        }
+
+        # write then rename, so readers never load a partial artifact
+        tmp_path = self.artifact_path.with_suffix(".tmp")
+        with tmp_path.open("wb") as out_artifact:
+            out_artifact.write(_artifact_magic)
+            out_artifact.write(json.dumps(self._artifact_header()).encode("UTF-8"))
+            out_artifact.write(b"\n")
+            marshal.dump(artifact, out_artifact)
+        tmp_path.replace(self.artifact_path)
+
+        logger.info("Template artifact written: {}".format(self.artifact_path))
+        return self.artifact_path
+
+    def variables(self) -> frozenset:
+        """Returns the names of the variables used by the template (body, headers
+        and footers), except the ones it defines itself (loops, assignments).
+        Parsed at first call.
+
+        :rtype: frozenset
+        """
+        if self._variables is None:
+            env = Environment()
+            variables = set()
+            for xml in [self.body_xml] + [i[2] for i in self.headers_footers_xml]:
+                variables |= meta.find_undeclared_variables(env.parse(xml))
+            # rows rendered without Jinja
+            for name, source, _, _ in self.rows:
+                variables.discard(name)
+                variables.add(source)
+            self._variables = frozenset(variables)
+        return self._variables
+
+    def is_stale(self) -> bool:
+        """Check if the template file changed since it has been cached."""
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return True
+        return (stat.st_mtime_ns, stat.st_size) != self.signature
+
+    def compiled(self, autoescape: bool = False) -> tuple:
+        """Returns the compiled Jinja templates for the body and the headers/footers,
+        compiling them at first call.
+
+        :param bool autoescape: Jinja autoescape mode
+
+        :rtype: tuple(Template, list)
+        """
+        autoescape = bool(autoescape)
+        if autoescape not in self._compiled:
+            with self._lock:
+                if autoescape not in self._compiled:
+                    env = Environment(autoescape=autoescape)
+                    # compile, unless the code comes from the artifact
+                    if autoescape not in self._codes:
+                        self._codes[autoescape] = (
+                            env.compile(self.body_xml.replace("<w:p>", "\n<w:p>")),
+                            [
+                                env.compile(xml.replace("<w:p>", "\n<w:p>"))
+                                for _, _, xml in self.headers_footers_xml
+                            ],
+                        )
+                    body_code, headers_footers_codes = self._codes.get(autoescape)
+
+                    body = env.template_class.from_code(
+                        env, body_code, env.make_globals(None)
+                    )
+                    headers_footers = [
+                        (
+                            rel_key,
+                            encoding,
+                            env.template_class.from_code(
+                                env, code, env.make_globals(None)
+                            ),
+                        )
+                        for (rel_key, encoding, _), code in zip(
+                            self.headers_footers_xml, headers_footers_codes
+                        )
+                    ]
+                    self._compiled[autoescape] = (body, headers_footers)
+
+        return self._compiled.get(autoescape)
+
+    @staticmethod
+    def render_compiled(template, context: dict) -> str:
+        """Render a compiled template and apply docxtpl post-processing.
+
+        :param Template template: compiled Jinja template
+        :param dict context: template context
+        """
+        dst_xml = template.render(context).replace("\n<w:p>", "<w:p>")
+        return (
+            dst_xml.replace("{_{", "{{")
+            .replace("}_}", "}}")
+            .replace("{_%", "{%")
+            .replace("%_}", "%}")
+        )
+
+    def precompressed(self) -> dict:
+        """Returns the parts of the template compressed once (or read as is from
+        the template file), to be copied into documents. See `precompress_parts`.
+
+        :rtype: dict
+        """
+        if self._members is None:
+            with self._lock:
+                if self._members is None:
+                    self._members = precompress_parts(
+                        self.pristine.docx.part.package, self.path
+                    )
+        return self._members
+
+    def render_rows(self, context: dict, autoescape: bool = False) -> dict:
+        """Render the table rows extracted by `compact_rows`: the row XML is joined
+        with the attributes of each item, escaped as Jinja would. Linear in the number
+        of rows, without any Jinja loop.
+
+        :param dict context: template context
+        :param bool autoescape: Jinja autoescape mode
+
+        :returns: rendered rows, by variable name
+        :rtype: dict
+        """
+        to_text = escape if autoescape else str
+        rows = {}
+        for name, source, literals, attributes in self.rows:
+            out = []
+            for item in context.get(source) or ():
+                get = item.get if isinstance(item, dict) else partial(getattr, item)
+                out.append(literals[0])
+                for attribute, literal in zip(attributes, literals[1:]):
+                    out.append(to_text(get(attribute, "")))
+                    out.append(literal)
+            rows[name] = Markup("".join(out))
+        return rows
+
+    def render_body(self, context: dict, autoescape: bool = False) -> str:
+        """Render the template body.
+
+        :param dict context: template context
+        :param bool autoescape: Jinja autoescape mode
+        """
+        body, _ = self.compiled(autoescape)
+        if self.rows:
+            context = dict(context, **self.render_rows(context, autoescape))
+        return self.render_compiled(body, context)
+
+    def new_template(self) -> CachedDocxTemplate:
+        """Returns a fresh template to fill, sharing media blobs and compiled Jinja
+        templates with the cache.
+
+        :rtype: CachedDocxTemplate
+        """
+        return CachedDocxTemplate(docx=deepcopy(self.pristine.docx), source=self)
+
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def compact_rows(xml: str) -> tuple:
+    """Replace the table rows repeated by a loop which only prints attributes of its
+    item (`{%tr for field in varFields %}` ... `{{ field.name }}`) by a variable
+    holding all the rows, rendered by `TemplateCache.render_rows`. Editing marks
+    (revision ids, spelling state) are removed from the rows, which makes big tables
+    lighter to render, parse and save. Other loops are left to Jinja.
+
+    :param str xml: patched template XML
+
+    :returns: XML and the extracted rows: (variable, source, literals, attributes)
+    :rtype: tuple(str, list)
+    """
+    rows = []
+
+    def compact(match):
+        item, source, row_xml = match.groups()
+        parts = _row_expression_regex.split(_row_marks_regex.sub("", row_xml))
+        literals, attributes = parts[::3], parts[2::3]
+        if any(i != item for i in parts[1::3]) or any(
+            "{{" in i or "{#" in i for i in literals
+        ):
+            return match.group(0)
+        name = "_rows_{}".format(len(rows))
+        rows.append((name, source, tuple(literals), tuple(attributes)))
+        return "{{ " + name + " }}"
+
+    return _row_loop_regex.sub(compact, xml), rows
+
+
+def precompile_template(
+    template_path: Path, known_variables: tuple = None, strict: bool = False
+) -> Path:
+    """Parse, patch and compile a Word template, check its variables and store the
+    result into an artifact next to the template, named after its content hash.
+    Next TemplateCache of the same template (in any process) created with
+    `use_artifact` loads it instead of patching and compiling again.
+
+    Variables are checked both ways: template variables not filled by the exporter
+    (typos, renamed variables) and exporter variables missing from the template
+    (dropped placeholders) are logged as warnings. Only the former make `strict`
+    fail, templates being free to show a part of the metadata only.
+
+    :param Path template_path: path to the Word template
+    :param tuple known_variables: variables filled by the exporter. If set, the \
+    template variables starting with "var" must be among them.
+    :param bool strict: raise an error if the template uses unknown variables, \
+    instead of logging a warning
+
+    :raises ValueError: if strict and the template uses unknown variables
+
+    :returns: path to the artifact
+    :rtype: Path
+    """
+    cache = TemplateCache(template_path, use_artifact=False)
+
+    if known_variables is not None:
+        variables = cache.variables()
+        unknown = sorted(
+            i for i in variables if i.startswith("var") and i not in known_variables
+        )
+        if unknown:
+            message = "Template {} uses unknown variables: {}".format(
+                cache.path, ", ".join(unknown)
+            )
+            if strict:
+                raise ValueError(message)
+            logger.warning(message)
+
+        unused = sorted(set(known_variables) - variables)
+        if unused:
+            logger.warning(
+                "Variables not used by the template {}: {}".format(
+                    cache.path, ", ".join(unused)
+                )
+            )
+
+    return cache.save_artifact()
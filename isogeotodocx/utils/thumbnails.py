@@ -0,0 +1,140 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Thumbnails read, downsized and recompressed once, then reused across documents.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+from io import BytesIO
+from os import stat
+from threading import Lock
+
+# 3rd party library
+from docx.image.image import Image as DocxImage
+from docx.shared import Emu, Inches
+from docxtpl import InlineImage
+
+# optional: Pillow is only required to downsize and recompress images
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class ThumbnailCache(object):
+    """Images processed once and kept in memory, keyed by path and modification time.
+
+    Without any option (or without Pillow installed), images are only read once.
+
+    :param int max_width: maximum width in pixels. Larger images are downsized.
+    :param int dpi: resolution to store into images. If not set, images keep the \
+    display size of the original file.
+    :param int jpeg_quality: quality used to recompress JPEG images
+    """
+
+    def __init__(self, max_width: int = None, dpi: int = None, jpeg_quality: int = 85):
+        self.max_width = max_width
+        self.dpi = dpi
+        self.jpeg_quality = jpeg_quality
+
+        self._images = {}
+        self._lock = Lock()
+
+        if Image is None and (max_width or dpi):
+            logger.warning(
+                "Pillow is not installed: thumbnails will not be downsized. "
+                "Install it with: pip install isogeo-export-docx[thumbnails]"
+            )
+
+    def get(self, image_path: str) -> tuple:
+        """Returns the processed image and its display width.
+
+        :param str image_path: path to the image file
+
+        :returns: image bytes and display width (EMU)
+        :rtype: tuple(bytes, int)
+        """
+        key = (image_path, stat(image_path).st_mtime_ns)
+        image = self._images.get(key)
+        if image is None:
+            image = self._process(image_path)
+            with self._lock:
+                self._images[key] = image
+        return image
+
+    def inline_image(self, docx_template, image_path: str) -> InlineImage:
+        """Returns an image ready to be inserted into a template context.
+
+        :param DocxTemplate docx_template: template the image will be inserted into
+        :param str image_path: path to the image file
+
+        :rtype: InlineImage
+        """
+        blob, width = self.get(image_path)
+        return InlineImage(docx_template, BytesIO(blob), width=Emu(width))
+
+    def _process(self, image_path: str) -> tuple:
+        """Read, downsize and recompress an image."""
+        with open(image_path, "rb") as in_image:
+            return self.process(in_image.read(), image_path)
+
+    def process(self, blob: bytes, name: str = "") -> tuple:
+        """Downsize and recompress an image, without caching it.
+
+        :param bytes blob: image content
+        :param str name: image name, for logs
+
+        :returns: image bytes and display width (EMU)
+        :rtype: tuple(bytes, int)
+        """
+        # display width as computed by python-docx for the original image
+        width = DocxImage.from_blob(blob).width
+
+        if Image is None or not (self.max_width or self.dpi):
+            return blob, width
+
+        with Image.open(BytesIO(blob)) as img:
+            img_format = img.format
+            if self.max_width and img.width > self.max_width:
+                height = max(1, round(img.height * self.max_width / img.width))
+                resample = getattr(Image, "Resampling", Image).LANCZOS
+                img = img.resize((self.max_width, height), resample)
+
+            save_options = {"optimize": True}
+            if img_format == "JPEG":
+                save_options["quality"] = self.jpeg_quality
+            if self.dpi:
+                save_options["dpi"] = (self.dpi, self.dpi)
+                width = Inches(img.width / self.dpi)
+
+            out_image = BytesIO()
+            img.save(out_image, format=img_format, **save_options)
+
+        processed = out_image.getvalue()
+        if not self.dpi and len(processed) >= len(blob):
+            # nothing gained (e.g. resampling a PNG with few colors): keep the original
+            processed = blob
+
+        logger.debug(
+            "Image processed: {} ({} -> {} bytes)".format(
+                name, len(blob), len(processed)
+            )
+        )
+        return processed, width
@@ -0,0 +1,91 @@
+# -*- coding: UTF-8 -*-
+#! python3  # noqa: E265
+
+"""
+    Flat and frozen translation tables, built once per language from the SDK
+    translator and shared by all exporters and formatters of the process.
+
+"""
+
+# ##############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import logging
+from functools import lru_cache
+from types import MappingProxyType
+
+# 3rd party library
+from isogeo_pysdk import IsogeoTranslator
+
+# ##############################################################################
+# ############ Globals ############
+# #################################
+
+logger = logging.getLogger("isogeotodocx")
+
+# ##############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TranslationTable(object):
+    """Read-only translations of Isogeo API strings, indexed by (subdomain, string).
+    Same results as `IsogeoTranslator.tr`, with a single lookup.
+
+    :param str lang: language code to apply. EN or FR.
+    """
+
+    __slots__ = ("lang", "table", "subdomains")
+
+    def __init__(self, lang: str = "FR"):
+        self.lang = lang.upper()
+        translations = IsogeoTranslator(lang).translations
+        self.subdomains = frozenset(translations)
+        self.table = MappingProxyType(
+            {
+                (subdomain, string): translated
+                for subdomain, strings in translations.items()
+                for string, translated in strings.items()
+            }
+        )
+
+    def tr(self, subdomain: str, string_to_translate: str = "") -> str:
+        """Returns translation of string passed.
+
+        :param str subdomain: subpart of strings dictionary. i.e. 'restrictions'
+        :param str string_to_translate: string you want to translate
+        """
+        try:
+            return self.table[(subdomain, string_to_translate)]
+        except (KeyError, TypeError):
+            if subdomain not in self.subdomains:
+                raise ValueError(
+                    "'{}' is not a correct subdomain."
+                    " Must be one of {}".format(subdomain, sorted(self.subdomains))
+                )
+            return "String not found"
+
+
+# ##############################################################################
+# ########## Functions #############
+# ##################################
+
+
+@lru_cache(maxsize=None)
+def _translation_table(lang: str) -> TranslationTable:
+    logger.debug("Translation table built for: {}".format(lang))
+    return TranslationTable(lang)
+
+
+def get_translation_table(lang: str = "FR") -> TranslationTable:
+    """Returns the translation table of a language, built at first call and then
+    shared by the whole process.
+
+    :param str lang: language code to apply. EN or FR.
+
+    :rtype: TranslationTable
+    """
+    # same fallback as the SDK translator: anything else than FR is EN
+    return _translation_table("FR" if lang.upper() == "FR" else "EN")
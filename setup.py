@@ -50,6 +50,7 @@ setup(
     extras_require={
         "dev": ["black", "python-dotenv"],
         "test": ["pytest", "pytest-cov"],
+        "thumbnails": ["Pillow"],
     },
     python_requires=">=3.6, <4",
     # packaging
@@ -57,6 +58,7 @@ setup(
         exclude=["contrib", "docs", "*.tests", "*.tests.*", "tests.*", "tests"]
     ),
     include_package_data=True,
+    entry_points={"console_scripts": ["isogeo2docx = isogeotodocx.__main__:main"]},
     classifiers=[
         "Intended Audience :: Developers",
         "Intended Audience :: Information Technology",
@@ -0,0 +1,111 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Micro-benchmark of Formatter.clean_xml against its former implementation, on the
+    fixtures texts. Launched from the root of the repository:
+
+    python -m tests.development.dev_benchmark_clean_xml
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import re
+from itertools import zip_longest
+from timeit import repeat
+from xml.sax.saxutils import escape
+
+# fixtures
+from tests.fixtures.fixture_conditions import fixture_conditions
+from tests.fixtures.fixture_limitations import fixture_limitations
+from tests.fixtures.fixture_metadatas import fixture_metadata_vector
+
+# target
+from isogeotodocx import Formatter
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def legacy_clean_xml(invalid_xml: str, mode: str = "soft", substitute: str = "_"):
+    """Former implementation of Formatter.clean_xml (up to 1.1.3), as reference."""
+    if invalid_xml is None:
+        return ""
+
+    if not isinstance(invalid_xml, str):
+        return invalid_xml
+
+    ws = r"[ \t\r\n]*"  # noqa: F841
+    name = "[a-zA-Z]+"  # noqa: F841
+    attr = '{name} {ws} = {ws} "[^"]*"'  # noqa: F841
+    start_tag = "< {ws} {name} {ws} (?:{attr} {ws})* /? {ws} >"  # noqa: F841
+    end_tag = "{ws}".join(["<", "/", "{name}", ">"])  # noqa: F841
+    tag = "{start_tag} | {end_tag}"
+
+    while "{" in tag:
+        tag = tag.format(**vars())
+
+    tag_regex = re.compile("(%s)" % tag, flags=re.VERBOSE)
+
+    iters = [iter(tag_regex.split(invalid_xml))] * 2
+    pairs = zip_longest(*iters, fillvalue="")
+
+    clean_version = "".join(escape(text) + tag for text, tag in pairs)
+    if mode == "strict":
+        clean_version = re.sub(r"<.*?>", substitute, clean_version)
+    return clean_version
+
+
+# #############################################################################
+# ######### Main program ###########
+# ##################################
+if __name__ == "__main__":
+    fmt = Formatter()
+
+    # texts as passed by md2docx: descriptions, titles, fields...
+    texts = [i.get("description") for i in fixture_conditions + fixture_limitations]
+    texts.extend(
+        fixture_metadata_vector.get(k)
+        for k in (
+            "abstract",
+            "collectionContext",
+            "collectionMethod",
+            "name",
+            "path",
+            "title",
+            "topologicalConsistency",
+            "validityComment",
+        )
+    )
+    for field in fixture_metadata_vector.get("feature-attributes"):
+        texts.extend((field.get("name"), field.get("alias"), field.get("description")))
+    texts.extend((None, 25000, ""))
+
+    # both implementations must return the same output
+    for mode in ("soft", "strict"):
+        for text in texts:
+            assert fmt.clean_xml(text, mode) == legacy_clean_xml(text, mode), text
+    assert fmt.clean_xml_batch(texts) == [legacy_clean_xml(i) for i in texts]
+
+    number = 200
+    timings = {
+        "legacy": lambda: [legacy_clean_xml(i) for i in texts],
+        "clean_xml": lambda: [fmt.clean_xml(i) for i in texts],
+        "clean_xml_batch": lambda: fmt.clean_xml_batch(texts),
+    }
+    results = {}
+    for label, func in timings.items():
+        results[label] = min(repeat(func, number=number, repeat=5)) / number
+    for label, duration in results.items():
+        print(
+            "{:<16} {:>9.1f} µs / {} texts - x{:.1f}".format(
+                label,
+                duration * 1e6,
+                len(texts),
+                results.get("legacy") / duration,
+            )
+        )
@@ -0,0 +1,257 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Benchmark of the export pipeline on synthetic metadatas, stage by stage and at
+    several scales. Each case runs in a fresh process to report its own peak memory.
+    Launched from the root of the repository:
+
+    python -m tests.development.dev_benchmark_export
+    python -m tests.development.dev_benchmark_export --scales 1 10000 --stages context
+    python -m tests.development.dev_benchmark_export --json bench.json
+    python -m tests.development.dev_benchmark_export --baseline bench.json
+
+    With a baseline (results previously saved with --json), the script exits with an
+    error if a stage throughput dropped more than the tolerance: run it before and
+    after upgrading docxtpl or isogeo-pysdk.
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import argparse
+import json
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from pathlib import Path
+from tempfile import TemporaryDirectory
+from time import perf_counter
+
+# resource is only available on Unix
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# 3rd party
+from docxtpl import DocxTemplate
+from isogeo_pysdk import Metadata
+
+# fixtures
+from tests.fixtures.fixture_synthetic import synthetic_metadatas
+
+# target
+from isogeotodocx import Isogeo2docx
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+template_path = "tests/fixtures/template_Isogeo.docx"
+text_fields = (
+    "title",
+    "abstract",
+    "name",
+    "path",
+    "topologicalConsistency",
+    "collectionContext",
+    "collectionMethod",
+    "validityComment",
+)
+
+# #############################################################################
+# ########## Stages ################
+# ##################################
+# each stage gets the exporter and the metadatas, and returns the time spent (seconds)
+# in the measured operation only, excluding its setup
+
+
+def stage_clean_xml(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Formatter.clean_xml on metadata texts and feature attributes."""
+    texts = []
+    for md in metadatas:
+        texts.extend(getattr(md, field) for field in text_fields)
+        for attribute in md.featureAttributes or ():
+            texts.extend((attribute.get("name"), attribute.get("description")))
+
+    start = perf_counter()
+    for text in texts:
+        to_docx.fmt.clean_xml(text)
+    return perf_counter() - start
+
+
+def stage_formatter(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Formatter conditions, limitations and specifications."""
+    start = perf_counter()
+    for md in metadatas:
+        to_docx.fmt.conditions(md.conditions or [])
+        to_docx.fmt.limitations(md.limitations or [])
+        to_docx.fmt.specifications(md.specifications or [])
+    return perf_counter() - start
+
+
+def stage_context(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Template context building."""
+    start = perf_counter()
+    for md in metadatas:
+        to_docx.build_context(md)
+    return perf_counter() - start
+
+
+def stage_load(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Template load without cache, as in the original export loop."""
+    start = perf_counter()
+    for _ in metadatas:
+        DocxTemplate(template_path)
+    return perf_counter() - start
+
+
+def stage_load_cached(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Template load from the parsed templates cache."""
+    to_docx.get_template(template_path)
+    start = perf_counter()
+    for _ in metadatas:
+        to_docx.get_template(template_path)
+    return perf_counter() - start
+
+
+def stage_render(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Context rendering into the template."""
+    elapsed = 0
+    for md in metadatas:
+        context = to_docx.build_context(md)
+        tpl = to_docx.get_template(template_path)
+        start = perf_counter()
+        to_docx.render_context(tpl, context)
+        elapsed += perf_counter() - start
+    return elapsed
+
+
+def stage_save(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Rendered document saving."""
+    elapsed = 0
+    for md in metadatas:
+        tpl = to_docx.get_template(template_path)
+        to_docx.md2docx(tpl, md)
+        start = perf_counter()
+        tpl.save(BytesIO())
+        elapsed += perf_counter() - start
+    return elapsed
+
+
+def stage_export(to_docx: Isogeo2docx, metadatas: list) -> float:
+    """Whole export of a metadata to a file."""
+    with TemporaryDirectory(prefix="i2o_bench_") as out_dir:
+        start = perf_counter()
+        for md in metadatas:
+            to_docx.export(template_path, md, out_dir)
+        return perf_counter() - start
+
+
+stages = {
+    "clean_xml": stage_clean_xml,
+    "formatter": stage_formatter,
+    "context": stage_context,
+    "load": stage_load,
+    "load_cached": stage_load_cached,
+    "render": stage_render,
+    "save": stage_save,
+    "export": stage_export,
+}
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def peak_rss_mb() -> float:
+    """Returns the peak resident memory of the current process (MB), if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # kilobytes on Linux, bytes on macOS
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def run_case(stage: str, scale: int, seed: int = 42) -> dict:
+    """Run a benchmark case. Meant to be executed in a fresh process.
+
+    :param str stage: stage name
+    :param int scale: number of metadatas
+    :param int seed: synthetic metadatas seed
+    """
+    to_docx = Isogeo2docx()
+    metadatas = [
+        Metadata.clean_attributes(md) for md in synthetic_metadatas(scale, seed)
+    ]
+    rss_before = peak_rss_mb()
+
+    elapsed = stages.get(stage)(to_docx, metadatas)
+
+    return {
+        "stage": stage,
+        "scale": scale,
+        "seconds": round(elapsed, 4),
+        "records_per_second": round(scale / elapsed, 2) if elapsed else None,
+        "peak_rss_mb": peak_rss_mb(),
+        "setup_rss_mb": rss_before,
+    }
+
+
+def compare(results: list, baseline: list, tolerance: float) -> list:
+    """Returns the cases whose throughput dropped more than the tolerance."""
+    reference = {(i.get("stage"), i.get("scale")): i for i in baseline}
+    regressions = []
+    for case in results:
+        ref = reference.get((case.get("stage"), case.get("scale")))
+        if not ref or not ref.get("records_per_second"):
+            continue
+        ratio = case.get("records_per_second") / ref.get("records_per_second")
+        if ratio < 1 - tolerance:
+            regressions.append(dict(case, ratio=round(ratio, 2)))
+    return regressions
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", nargs="+", type=int, default=[1, 10, 100])
+    parser.add_argument("--stages", nargs="+", choices=stages, default=list(stages))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", type=Path, help="store results into a JSON file")
+    parser.add_argument("--baseline", type=Path, help="results to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = []
+    print(
+        "{:<12} {:>7} {:>10} {:>12} {:>10}".format(
+            "stage", "scale", "seconds", "records/s", "peak MB"
+        )
+    )
+    for stage in args.stages:
+        for scale in args.scales:
+            # fresh process, so the peak memory is the one of this case
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                case = executor.submit(run_case, stage, scale, args.seed).result()
+            results.append(case)
+            print(
+                "{stage:<12} {scale:>7} {seconds:>10.3f} {records_per_second:>12} "
+                "{peak_rss_mb:>10}".format(**case)
+            )
+
+    if args.json:
+        args.json.write_text(json.dumps(results, indent=2))
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.tolerance
+        )
+        for case in regressions:
+            print("REGRESSION: {stage} x {scale}: {ratio} of baseline".format(**case))
+        sys.exit(1 if regressions else 0)
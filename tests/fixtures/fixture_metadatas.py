@@ -0,0 +1,151 @@
+fixture_metadata_vector = {
+    "_abilities": [],
+    "_created": "2019-08-09T14:23:28.1714829+00:00",
+    "_creator": {
+        "_id": "32f7e95ec4e94ca3bc1afda960003882",
+        "_tag": "owner:32f7e95ec4e94ca3bc1afda960003882",
+        "contact": {
+            "_id": "2a3aefc4f80347f590afe58127f6cb0f",
+            "name": "Isogeo TEST",
+            "countryCode": "FR",
+        },
+    },
+    "_id": "70f1192f67ac43e5987800ead18effb2",
+    "_modified": "2019-10-07T13:10:57.3587539+00:00",
+    "abstract": "**Gras**\n*Italique*\t\n<del>Supprimé</del>\n<cite>Citation</cite>\n\n* Élément 1\n* Élément 2\n\n1. Élément 1\n2. Élément 2\n\n[Foo](http://foo.bar) & co",
+    "collectionContext": "Contexte de collecte < 2019",
+    "collectionMethod": "Méthode de collecte > ancienne",
+    "conditions": [
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+            "description": "Texte de la condition",
+            "license": {
+                "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+                "_tag": "license:isogeo:1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+                "name": "ODbL 1.0 - Open Database Licence",
+                "link": "https://vvlibri.org/fr/licence/odbl-10/legalcode/unofficial",
+            },
+        }
+    ],
+    "contacts": [
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+            "role": "pointOfContact",
+            "contact": {
+                "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+                "name": "Isogeo Test",
+                "organization": "Isogeo",
+                "email": "test@isogeo.fr",
+                "phone": "+33 (0)1 23 45 67 89",
+                "addressLine1": "26 rue du faubourg Saint-Antoine",
+                "zipCode": "75012",
+                "city": "Paris",
+                "countryCode": "FR",
+            },
+        },
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m20z",
+            "role": "author",
+            "contact": {"_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m20z", "name": "Auteur"},
+        },
+    ],
+    "created": "2018-06-04T00:00:00+00:00",
+    "encoding": "UTF-8",
+    "events": [
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+            "date": "2018-06-04T00:00:00+00:00",
+            "description": "Création des données",
+            "kind": "creation",
+        },
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m20z",
+            "date": "2019-08-09T00:00:00+00:00",
+            "description": "Mise à jour <b>complète</b> & corrections",
+            "kind": "update",
+        },
+    ],
+    "feature-attributes": [
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+            "name": "ID",
+            "alias": "Identifiant",
+            "dataType": "integer",
+            "description": "Identifiant unique",
+            "language": "fr",
+        },
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m20z",
+            "name": "NOM",
+            "alias": "Nom <court>",
+            "dataType": "string",
+            "description": "Nom & prénom",
+            "language": "fr",
+        },
+    ],
+    "features": 32,
+    "format": "shp",
+    "formatVersion": "1.0",
+    "geometry": "Polygon",
+    "limitations": [
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+            "type": "legal",
+            "description": "Ceci est un **copyright**",
+            "restriction": "copyright",
+        },
+        {
+            "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m20z",
+            "type": "security",
+            "description": "",
+        },
+    ],
+    "modified": "2019-08-09T00:00:00+00:00",
+    "name": "isogeo_fixture_vector.shp",
+    "path": "\\\\Isogeo\\Fixtures\\isogeo_fixture_vector.shp",
+    "published": "2019-08-10T00:00:00+00:00",
+    "scale": 25000,
+    "specifications": [
+        {
+            "conformant": True,
+            "specification": {
+                "_id": "1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+                "_tag": "specification:isogeo:1a2b3c4d5e6f7g8h9i0j11k12l13m14n",
+                "name": "CNIG CC v2014",
+                "link": "http://cnig.gouv.fr/wp-content/uploads/2014/10/141002_Standard_CNIG_CC_diffusion.pdf",
+                "published": "2014-10-02T00:00:00",
+            },
+        }
+    ],
+    "tags": {
+        "conformity:inspire": "INSPIRE",
+        "coordinate-system:2154": "RGF93 / Lambert-93 (EPSG:2154)",
+        "format:shp": "Esri Shapefiles",
+        "keyword:inspire-theme:administrativeunits": "Unités administratives",
+        "keyword:isogeo:fixture": "fixture",
+        "keyword:isogeo:test": "test",
+        "owner:32f7e95ec4e94ca3bc1afda960003882": "Isogeo TEST",
+        "type:vector-dataset": "Vecteur",
+    },
+    "title": "Isogeo fixture - Vector dataset",
+    "topologicalConsistency": "Topologie & cohérence",
+    "type": "vectorDataset",
+    "validFrom": "2019-01-01T00:00:00+00:00",
+    "validTo": "2029-12-31T00:00:00+00:00",
+    "validityComment": "Valide",
+}
+
+fixture_metadata_resource = {
+    "_created": "2019-08-09T14:23:28.1714829+00:00",
+    "_creator": {
+        "_id": "32f7e95ec4e94ca3bc1afda960003882",
+        "contact": {"_id": "2a3aefc4f80347f590afe58127f6cb0f", "name": "Isogeo TEST"},
+    },
+    "_id": "b140d9a92c20416d97c3cdc12dc12607",
+    "_modified": "2019-08-09T14:23:28.1714829+00:00",
+    "abstract": "Ressource sans caractère spécial",
+    "name": "isogeo_fixture_resource",
+    "tags": {"keyword:isogeo:fixture": "fixture"},
+    "title": "Isogeo fixture - Resource",
+    "type": "resource",
+}
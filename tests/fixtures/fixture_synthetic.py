@@ -0,0 +1,112 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Synthetic metadatas, generated offline from the fixtures, to benchmark the export
+    at any scale without API access. Generation is deterministic for a given seed.
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import random
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+
+# fixtures
+from .fixture_metadatas import fixture_metadata_resource, fixture_metadata_vector
+
+# #############################################################################
+# ######## Globals #################
+# ##################################
+
+_words = (
+    "réseau",
+    "bâti",
+    "parcelle",
+    "cours d'eau",
+    "zone < 50m",
+    "PLU & PLUi",
+    "voirie",
+    "<b>limite</b>",
+    "commune",
+    "données > 2019",
+)
+_data_types = ("integer", "string", "double", "date", "boolean")
+_event_kinds = ("update", "publication", "creation")
+
+# #############################################################################
+# ########## Functions #############
+# ##################################
+
+
+def _text(rng: random.Random, words: int) -> str:
+    """Returns a text of random words, with XML special characters."""
+    return " ".join(rng.choice(_words) for _ in range(words))
+
+
+def _date(rng: random.Random) -> str:
+    """Returns a random date formatted as by the API."""
+    date = datetime(2010, 1, 1, tzinfo=timezone.utc) + timedelta(
+        days=rng.randint(0, 4000), seconds=rng.randint(0, 86399)
+    )
+    return date.isoformat()
+
+
+def synthetic_metadata(rng: random.Random, max_attributes: int = 50) -> dict:
+    """Returns a metadata as returned by the API, with random content.
+
+    :param random.Random rng: random generator
+    :param int max_attributes: maximum number of feature attributes of vector datasets
+    """
+    is_vector = rng.random() < 0.8
+    md = deepcopy(fixture_metadata_vector if is_vector else fixture_metadata_resource)
+
+    md["_id"] = "{:032x}".format(rng.getrandbits(128))
+    md["_created"] = _date(rng)
+    md["_modified"] = _date(rng)
+    md["title"] = _text(rng, rng.randint(2, 8))
+    md["abstract"] = "\n".join(_text(rng, 12) for _ in range(rng.randint(0, 20)))
+    md["tags"] = dict(md.get("tags", {}))
+    for i in range(rng.randint(0, 15)):
+        md["tags"]["keyword:isogeo:synthetic-{}".format(i)] = _text(rng, 2)
+
+    if is_vector:
+        md["name"] = "synthetic_{}.shp".format(md.get("_id")[:8])
+        md["features"] = rng.randint(0, 1000000)
+        md["feature-attributes"] = [
+            {
+                "_id": "{:032x}".format(rng.getrandbits(128)),
+                "name": "FIELD_{}".format(i),
+                "alias": _text(rng, 2),
+                "dataType": rng.choice(_data_types),
+                "description": _text(rng, rng.randint(0, 10)),
+                "language": "fr",
+            }
+            for i in range(rng.randint(0, max_attributes))
+        ]
+        md["events"] = [
+            {
+                "_id": "{:032x}".format(rng.getrandbits(128)),
+                "date": _date(rng),
+                "description": _text(rng, rng.randint(0, 6)),
+                "kind": rng.choice(_event_kinds),
+            }
+            for _ in range(rng.randint(0, 10))
+        ]
+
+    return md
+
+
+def synthetic_metadatas(count: int, seed: int = 42, max_attributes: int = 50):
+    """Yield synthetic metadatas.
+
+    :param int count: number of metadatas
+    :param int seed: random seed. The same seed gives the same metadatas.
+    :param int max_attributes: maximum number of feature attributes of vector datasets
+    """
+    rng = random.Random(seed)
+    for _ in range(count):
+        yield synthetic_metadata(rng, max_attributes=max_attributes)
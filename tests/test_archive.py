@@ -0,0 +1,152 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_archive
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+from io import BytesIO, RawIOBase
+from pathlib import Path
+import tarfile
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+from zipfile import ZIP_STORED, ZipFile
+
+# 3rd party
+from docx import Document
+
+# fixtures
+from .fixtures.fixture_metadatas import (
+    fixture_metadata_resource,
+    fixture_metadata_vector,
+)
+
+# target
+from isogeotodocx import Isogeo2docx
+from isogeotodocx.utils import save_docx
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class _Socket(RawIOBase):
+    """Write-only, non seekable stream."""
+
+    def __init__(self):
+        self.received = BytesIO()
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        return self.received.write(data)
+
+
+class TestArchive(unittest.TestCase):
+    """Test export into an archive of documents."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.word_template = "tests/fixtures/template_Isogeo.docx"
+        self.to_docx = Isogeo2docx()
+        self.metadatas = [fixture_metadata_vector, fixture_metadata_resource]
+        self.names = [
+            "isogeo-fixture-vector-dataset_70f11.docx",
+            "isogeo-fixture-resource_b140d.docx",
+        ]
+
+    def test_zip_stream(self):
+        """ZIP archive written into a non seekable stream."""
+        out_stream = _Socket()
+        count = self.to_docx.export_archive(
+            self.word_template,
+            (deepcopy(md) for md in self.metadatas),
+            out_archive=out_stream,
+        )
+        self.assertEqual(count, 2)
+
+        with ZipFile(out_stream.received) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), self.names)
+            for member in archive.infolist():
+                self.assertEqual(member.compress_type, ZIP_STORED)
+                Document(BytesIO(archive.read(member)))
+
+    def test_tar(self):
+        """Compressed TAR archive written into a file."""
+        with TemporaryDirectory(prefix="i2o_test_archive_") as out_dir:
+            out_path = Path(out_dir) / "catalog.tar.gz"
+            self.to_docx.export_archive(
+                self.word_template,
+                (deepcopy(md) for md in self.metadatas),
+                out_archive=out_path,
+                archive_format="tar.gz",
+                compress=False,
+            )
+            with tarfile.open(str(out_path)) as archive:
+                self.assertEqual(archive.getnames(), self.names)
+                for member in archive.getmembers():
+                    Document(archive.extractfile(member))
+
+    def test_save_error(self):
+        """A document failing to save is skipped, the archive remains valid."""
+        calls = []
+
+        def failing_save(docx_template, out, **kwargs):
+            calls.append(out)
+            if len(calls) == 1:
+                raise OSError("disk full")
+            return save_docx(docx_template, out, **kwargs)
+
+        out_stream = BytesIO()
+        with patch("isogeotodocx.isogeo2docx.save_docx", failing_save):
+            count = self.to_docx.export_archive(
+                self.word_template,
+                (deepcopy(md) for md in self.metadatas),
+                out_archive=out_stream,
+            )
+        self.assertEqual(count, 1)
+        with ZipFile(out_stream) as archive:
+            self.assertIsNone(archive.testzip())
+            self.assertEqual(archive.namelist(), self.names[1:])
+
+    def test_partial_archive_deleted(self):
+        """Archive file deleted if the export is interrupted."""
+
+        def metadatas():
+            yield deepcopy(fixture_metadata_vector)
+            raise KeyboardInterrupt
+
+        with TemporaryDirectory(prefix="i2o_test_archive_") as out_dir:
+            out_path = Path(out_dir) / "metadatas.zip"
+            with self.assertRaises(KeyboardInterrupt):
+                self.to_docx.export_archive(
+                    self.word_template, metadatas(), out_archive=out_path
+                )
+            self.assertFalse(out_path.exists())
+
+    def test_invalid_format(self):
+        """Unknown archive format."""
+        with self.assertRaises(ValueError):
+            self.to_docx.export_archive(
+                self.word_template, [], out_archive=BytesIO(), archive_format="rar"
+            )
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_catalog
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+from io import BytesIO
+import re
+import unittest
+from zipfile import ZipFile
+
+# 3rd party
+from docx import Document
+
+# fixtures
+from .fixtures.fixture_metadatas import (
+    fixture_metadata_resource,
+    fixture_metadata_vector,
+)
+
+# target
+from isogeotodocx import Isogeo2docx
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestCatalog(unittest.TestCase):
+    """Test export of many metadatas into a single document."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.word_template = "tests/fixtures/template_Isogeo.docx"
+        self.to_docx = Isogeo2docx(
+            thumbnails={
+                fixture_metadata_vector.get("_id"): "tests/fixtures/img/isogeo_logo.png"
+            }
+        )
+
+    def test_catalog(self):
+        """Sheets are repeated into a valid document, with a table of contents."""
+        metadatas = [fixture_metadata_vector, fixture_metadata_resource] * 3
+        out_docx = BytesIO()
+        count = self.to_docx.catalog2docx(
+            template_path=self.word_template,
+            metadatas=(deepcopy(md) for md in metadatas),
+            out_docx=out_docx,
+            toc_levels=1,
+        )
+        self.assertEqual(count, 6)
+
+        with ZipFile(out_docx) as docx_out:
+            self.assertIsNone(docx_out.testzip())
+            document_xml = docx_out.read("word/document.xml").decode("UTF-8")
+            self.assertIn("updateFields", docx_out.read("word/settings.xml").decode())
+
+        self.assertEqual(document_xml.count("Isogeo fixture - Vector dataset"), 3)
+        self.assertEqual(document_xml.count("Isogeo fixture - Resource"), 3)
+        self.assertIn(" TOC ", document_xml)
+        # drawings ids are unique
+        drawing_ids = re.findall(r'docPr id="(\d+)"', document_xml)
+        self.assertEqual(len(drawing_ids), len(set(drawing_ids)))
+
+        # readable by python-docx, with the thumbnails of vector metadatas (the
+        # template displays it twice)
+        document = Document(out_docx)
+        self.assertEqual(len(document.inline_shapes), 3 * 2)
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
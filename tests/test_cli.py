@@ -0,0 +1,111 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_cli
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+# fixtures
+from .fixtures.fixture_synthetic import synthetic_metadatas
+
+# target
+from isogeotodocx import ExportManifest
+from isogeotodocx.__main__ import main
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestCli(unittest.TestCase):
+    """Test the command line interface."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.tmp_dir = TemporaryDirectory(prefix="i2o_test_cli_")
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.word_template = "tests/fixtures/template_Isogeo.docx"
+
+        # search dump
+        self.search_dump = self.tmp_path / "search.jsonl"
+        with self.search_dump.open("w", encoding="UTF-8") as out_dump:
+            for md in synthetic_metadatas(6):
+                out_dump.write(json.dumps(md) + "\n")
+
+    def tearDown(self):
+        """Executed after each test."""
+        self.tmp_dir.cleanup()
+
+    def test_export_resume(self):
+        """Export a search dump, then resume from the checkpoint."""
+        out_dir = self.tmp_path / "out"
+        argv = [
+            "export",
+            "--input",
+            str(self.search_dump),
+            "--template",
+            self.word_template,
+            "--out",
+            str(out_dir),
+            "--workers",
+            "1",
+        ]
+        self.assertEqual(main(argv), 0)
+        documents = sorted(out_dir.glob("*.docx"))
+        self.assertEqual(len(documents), 6)
+
+        # a document lost by an interrupted run is the only one exported again
+        documents[0].unlink()
+        mtimes = {i: i.stat().st_mtime_ns for i in documents[1:]}
+        self.assertEqual(main(argv), 0)
+        self.assertTrue(documents[0].is_file())
+        self.assertEqual({i: i.stat().st_mtime_ns for i in documents[1:]}, mtimes)
+
+        with ExportManifest(out_dir / ".isogeo2docx_checkpoint.sqlite") as manifest:
+            self.assertEqual(len(manifest), 6)
+
+    def test_export_corrupt_checkpoint(self):
+        """Unreadable checkpoint fails with an error code, until restarted."""
+        out_dir = self.tmp_path / "out"
+        out_dir.mkdir()
+        (out_dir / ".isogeo2docx_checkpoint.sqlite").write_bytes(b"not a database" * 64)
+        argv = [
+            "export",
+            "-i",
+            str(self.search_dump),
+            "-t",
+            self.word_template,
+            "-o",
+            str(out_dir),
+            "-w",
+            "1",
+        ]
+        with self.assertLogs("isogeotodocx", "ERROR"):
+            self.assertEqual(main(argv), 1)
+        self.assertEqual(main(argv + ["--restart"]), 0)
+
+    def test_export_missing_input(self):
+        """Missing search dump fails with an error code."""
+        argv = ["export", "-i", "missing.json", "-t", self.word_template]
+        self.assertEqual(main(argv + ["-o", str(self.tmp_path)]), 1)
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
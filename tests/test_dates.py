@@ -0,0 +1,75 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_dates
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+import unittest
+
+# 3rd party
+from isogeo_pysdk import IsogeoUtils, Metadata
+
+# fixtures
+from .fixtures.fixture_metadatas import fixture_metadata_vector
+
+# target
+from isogeotodocx import DateFormatter, Formatter, Isogeo2docx
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestDates(unittest.TestCase):
+    """Test cached dates formatting."""
+
+    def test_format(self):
+        """Same result as the SDK helper, computed once."""
+        date_formatter = DateFormatter(maxsize=2)
+        for in_date in (
+            "2018-06-04",
+            "2018-06-04T00:00:00+00:00",
+            "2019-06-13T16:21:38.1917618+00:00",
+        ):
+            for _ in range(3):
+                self.assertEqual(
+                    date_formatter.format(in_date, "%d/%m/%Y %H:%M"),
+                    IsogeoUtils.hlpr_datetimes(in_date).strftime("%d/%m/%Y %H:%M"),
+                )
+
+        cache_info = date_formatter.cache_info()
+        self.assertEqual((cache_info.hits, cache_info.misses), (6, 3))
+        # bounded
+        self.assertEqual(cache_info.currsize, 2)
+
+    def test_shared(self):
+        """Exporter and formatter share the dates formatter."""
+        to_docx = Isogeo2docx()
+        self.assertIs(to_docx.date_formatter, Formatter().date_formatter)
+
+        date_formatter = DateFormatter()
+        to_docx = Isogeo2docx(date_formatter=date_formatter)
+        self.assertIs(to_docx.fmt.date_formatter, date_formatter)
+
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        context = to_docx.build_context(md, export_date="batch date")
+        self.assertEqual(context.get("varMdDtExp"), "batch date")
+        self.assertGreater(date_formatter.cache_info().misses, 0)
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,171 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_export_async
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from io import BytesIO
+from threading import Lock
+import unittest
+
+# 3rd party
+from docx import Document
+
+# fixtures
+from .fixtures.fixture_metadatas import (
+    fixture_metadata_resource,
+    fixture_metadata_vector,
+)
+
+# target
+from isogeotodocx import Isogeo2docx
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestExportAsync(unittest.TestCase):
+    """Test asynchronous export."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.word_template = "tests/fixtures/template_Isogeo.docx"
+        self.to_docx = Isogeo2docx(async_workers=2)
+
+        # count documents rendered at once
+        self.running = self.max_running = 0
+        lock = Lock()
+        md2bytes = self.to_docx.md2bytes
+
+        def counted(*args, **kwargs):
+            with lock:
+                self.running += 1
+                self.max_running = max(self.max_running, self.running)
+            try:
+                return md2bytes(*args, **kwargs)
+            finally:
+                with lock:
+                    self.running -= 1
+
+        self.to_docx.md2bytes = counted
+
+    def tearDown(self):
+        """Executed after each test."""
+        self.to_docx.close()
+
+    def test_export_async(self):
+        """Concurrent exports are bounded and do not block the event loop."""
+        metadatas = [fixture_metadata_vector, fixture_metadata_resource] * 3
+
+        async def run():
+            ticks = 0
+            done = asyncio.Event()
+
+            async def ticker():
+                nonlocal ticks
+                while not done.is_set():
+                    ticks += 1
+                    await asyncio.sleep(0.001)
+
+            ticker_task = asyncio.ensure_future(ticker())
+            results = await asyncio.gather(
+                *(
+                    self.to_docx.export_async(self.word_template, deepcopy(md))
+                    for md in metadatas
+                )
+            )
+            done.set()
+            await ticker_task
+            return results, ticks
+
+        results, ticks = asyncio.run(run())
+        self.assertEqual(len(results), 6)
+        self.assertEqual(self.max_running, 2)
+        # the loop kept running while documents were rendered
+        self.assertGreater(ticks, 10)
+        for docx in results:
+            Document(BytesIO(docx))
+
+    def test_export_stream_async(self):
+        """Document streamed by chunks."""
+
+        async def run():
+            chunks = []
+            async for chunk in self.to_docx.export_stream_async(
+                self.word_template, deepcopy(fixture_metadata_vector), chunk_size=4096
+            ):
+                chunks.append(chunk)
+            return chunks
+
+        chunks = asyncio.run(run())
+        self.assertGreater(len(chunks), 1)
+        self.assertTrue(all(len(chunk) <= 4096 for chunk in chunks))
+        Document(BytesIO(b"".join(chunks)))
+
+    def test_several_loops(self):
+        """Event loops sharing the exporter keep their own semaphore, and renderings
+        stay bounded across them."""
+        metadatas = [fixture_metadata_vector, fixture_metadata_resource] * 2
+        semaphores = []
+
+        async def run():
+            semaphores.append(self.to_docx._get_async_semaphore())
+            self.assertIs(self.to_docx._get_async_semaphore(), semaphores[-1])
+            return await asyncio.gather(
+                *(
+                    self.to_docx.export_async(self.word_template, deepcopy(md))
+                    for md in metadatas
+                )
+            )
+
+        with ThreadPoolExecutor(max_workers=2) as loops:
+            results = list(loops.map(lambda _: asyncio.run(run()), range(2)))
+
+        self.assertEqual(len(semaphores), 2)
+        self.assertIsNot(semaphores[0], semaphores[1])
+        self.assertEqual([len(i) for i in results], [4, 4])
+        self.assertLessEqual(self.max_running, 2)
+
+    def test_close(self):
+        """Thread pool shut down on close, created again if needed."""
+        asyncio.run(
+            self.to_docx.export_async(
+                self.word_template, deepcopy(fixture_metadata_vector)
+            )
+        )
+        executor = self.to_docx._async_executor
+        self.assertIsNotNone(executor)
+
+        with self.to_docx:
+            pass
+        self.assertIsNone(self.to_docx._async_executor)
+        with self.assertRaises(RuntimeError):
+            executor.submit(print)
+
+        docx = asyncio.run(
+            self.to_docx.export_async(
+                self.word_template, deepcopy(fixture_metadata_vector)
+            )
+        )
+        Document(BytesIO(docx))
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
@@ -14,17 +14,31 @@
 # ##################################
 
 # Standard library
+from concurrent.futures import ThreadPoolExecutor
+from copy import deepcopy
+from io import BytesIO
 import json
+from itertools import islice
 from os import path
-from tempfile import mkstemp
+from pathlib import Path
+import pickle
+from tempfile import TemporaryDirectory, mkstemp
 import unittest
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
 
 # 3rd party
-from docxtpl import DocxTemplate
-from isogeo_pysdk import Metadata
+from docx import Document
+from isogeo_pysdk import Metadata, Share
+
+# fixtures
+from .fixtures.fixture_metadatas import (
+    fixture_metadata_resource,
+    fixture_metadata_vector,
+)
 
 # target
-from isogeotodocx import Isogeo2docx
+from isogeotodocx import Isogeo2docx, get_exporter, iter_search_results
+from isogeotodocx.isogeo2docx import _get_worker_exporter
 
 # #############################################################################
 # ######## Globals #################
@@ -60,24 +74,333 @@ class TestExportDocx(unittest.TestCase):
         """Test search results export"""
         # temp output file
         # out_docx = mkstemp(prefix="i2o_test_docx_")
-        # load tags fixtures
-        with open(self.search_all_includes, "r") as f:
-            search = json.loads(f.read())
-        # load template
-        tpl = DocxTemplate(self.word_template)
+        # stream search fixtures
+        search = iter_search_results(self.search_all_includes)
         # run
-        for md in search.get("results")[:20]:
+        for md in islice(search, 20):
             metadata = Metadata.clean_attributes(md)
             # output path
             out_docx = mkstemp(prefix="i2o_test_docx_")
             out_docx_path = out_docx[1] + ".docx"
             # templating
-            tpl = DocxTemplate(self.word_template)
+            tpl = self.to_docx.get_template(self.word_template)
             self.to_docx.md2docx(tpl, metadata)
             # save
             tpl.save(out_docx_path)
             del tpl
 
+    def test_context_build_render(self):
+        """Context is built once, serialized and rendered into many templates."""
+        to_docx = Isogeo2docx(
+            thumbnails={
+                fixture_metadata_vector.get("_id"): "tests/fixtures/img/isogeo_logo.png"
+            }
+        )
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        context = json.loads(json.dumps(to_docx.build_context(md)))
+        self.assertEqual(context.get("varTitle"), md.title)
+        self.assertIsInstance(context.get("varThumbnail"), str)
+
+        with TemporaryDirectory(prefix="i2o_test_docx_") as out_dir:
+            for i in range(2):
+                tpl = to_docx.get_template(self.word_template)
+                self.assertTrue(to_docx.render_context(tpl, context))
+                tpl.save(str(Path(out_dir) / "{}.docx".format(i)))
+                self.assertEqual(len(tpl.docx.inline_shapes), 2)
+        # context is left untouched by rendering
+        self.assertIsInstance(context.get("varThumbnail"), str)
+
+    def test_context_sections(self):
+        """Only the sections used by the template are built."""
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        full = self.to_docx.build_context(md, export_date="now")
+        self.assertIn("varFields", full)
+        self.assertIn("varContactsDetails", full)
+
+        context = self.to_docx.build_context(
+            md, variables=frozenset(("varTitle", "varAbstract", "varFieldsCount"))
+        )
+        self.assertEqual(context.get("varTitle"), full.get("varTitle"))
+        self.assertEqual(context.get("varFields"), full.get("varFields"))
+        self.assertNotIn("varContactsDetails", context)
+        self.assertNotIn("varEvents", context)
+
+        # the Isogeo template uses every section
+        variables = self.to_docx.get_template_cache(self.word_template).variables()
+        self.assertEqual(
+            self.to_docx.build_context(md, export_date="now", variables=variables), full
+        )
+
+    def test_md2bytes(self):
+        """Export into memory or a stream, compressed or not."""
+        deflated = self.to_docx.md2bytes(
+            self.word_template, deepcopy(fixture_metadata_vector)
+        )
+        stored = BytesIO()
+        self.assertIsNone(
+            self.to_docx.md2bytes(
+                self.word_template,
+                deepcopy(fixture_metadata_vector),
+                out_docx=stored,
+                compress=False,
+            )
+        )
+
+        for docx, compression in (
+            (BytesIO(deflated), ZIP_DEFLATED),
+            (stored, ZIP_STORED),
+        ):
+            with ZipFile(docx) as docx_zip:
+                self.assertIsNone(docx_zip.testzip())
+                self.assertEqual(
+                    docx_zip.getinfo("word/document.xml").compress_type, compression
+                )
+            self.assertEqual(
+                Document(docx).paragraphs[0].text, fixture_metadata_vector.get("title")
+            )
+        self.assertGreater(len(stored.getvalue()), len(deflated))
+        with ZipFile(stored) as docx_zip:
+            self.assertEqual(
+                {i.compress_type for i in docx_zip.infolist()}, {ZIP_STORED}
+            )
+
+    def test_get_exporter(self):
+        """Shared exporters, by language, used from several threads."""
+        to_docx = get_exporter(lang="en", templates=(self.word_template,))
+        self.assertIs(to_docx, get_exporter(lang="EN"))
+        self.assertIsNot(to_docx, get_exporter(lang="FR"))
+        # formatter in the selected language
+        self.assertEqual(
+            to_docx.fmt.isogeo_tr("quality", "isConform"),
+            to_docx.isogeo_tr("quality", "isConform"),
+        )
+        self.assertNotEqual(
+            to_docx.fmt.isogeo_tr("quality", "isConform"),
+            get_exporter(lang="FR").fmt.isogeo_tr("quality", "isConform"),
+        )
+
+        def export(md: dict) -> bool:
+            tpl = to_docx.get_template(self.word_template)
+            return to_docx.md2docx(tpl, Metadata.clean_attributes(deepcopy(md)))
+
+        metadatas = [fixture_metadata_vector, fixture_metadata_resource] * 4
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            self.assertTrue(all(executor.map(export, metadatas)))
+
+    def test_urls(self):
+        """URLs bases are set by exporter, without cross-talk between threads."""
+        share = Share(_id="1" * 32, urlToken="token")
+        exporters = {
+            base: Isogeo2docx(
+                url_base_edit="https://app.{}".format(base),
+                url_base_view="https://open.{}/".format(base),
+            )
+            for base in ("isogeo.com", "qa.isogeo.com")
+        }
+
+        def build(base: str) -> tuple:
+            md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+            context = exporters.get(base).build_context(md, share)
+            return base, context.get("varEditAPP"), context.get("varViewOC")
+
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for base, edit_url, view_url in executor.map(build, list(exporters) * 10):
+                self.assertTrue(
+                    edit_url.startswith(
+                        "https://app.{}/groups/32f7e95ec4e94ca3bc1afda960003882/"
+                        "resources/{}/".format(base, fixture_metadata_vector["_id"])
+                    )
+                )
+                self.assertEqual(
+                    view_url,
+                    "https://open.{}/s/{}/token/r/{}".format(
+                        base, "1" * 32, fixture_metadata_vector["_id"]
+                    ),
+                )
+
+    def test_shares(self):
+        """OpenCatalog links from the exported share or from the shares index."""
+        shares = [
+            Share(_id="1" * 32, urlToken="first", name="First"),
+            Share(_id="2" * 32, urlToken="second", name="Second"),
+        ]
+        vector_id = fixture_metadata_vector.get("_id")
+        resource_id = fixture_metadata_resource.get("_id")
+        index = self.to_docx.index_shares(
+            [
+                (shares[0], [fixture_metadata_vector]),
+                (shares[1], [vector_id, Metadata(_id=resource_id)]),
+            ]
+        )
+        self.assertEqual(
+            index.get(vector_id), self.to_docx.get_view_url_prefix(shares[0])
+        )
+        self.assertTrue(index.get(resource_id).endswith("/second/r/"))
+
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        self.assertEqual(
+            self.to_docx.build_context(md, shares_index=index).get("varViewOC"),
+            self.to_docx.get_view_url(vector_id, shares[0]),
+        )
+        self.assertEqual(
+            self.to_docx.build_context(md, shares[1], shares_index=index).get(
+                "varViewOC"
+            ),
+            self.to_docx.get_view_url(vector_id, shares[1]),
+        )
+
+        # the exporter is left as is: calls (and shared exporters) do not leak shares
+        self.assertEqual(self.to_docx.shares_index, {})
+        other_index = self.to_docx.index_shares([(shares[1], [vector_id])])
+        self.assertEqual(
+            self.to_docx.build_context(md, shares_index=other_index).get("varViewOC"),
+            self.to_docx.get_view_url(vector_id, shares[1]),
+        )
+        self.assertNotEqual(
+            self.to_docx.build_context(md).get("varViewOC"),
+            self.to_docx.get_view_url(vector_id, shares[0]),
+        )
+        to_docx = Isogeo2docx(shares_index=index)
+        self.assertEqual(
+            to_docx.build_context(md).get("varViewOC"),
+            to_docx.get_view_url(vector_id, shares[0]),
+        )
+        shared = get_exporter(lang="FR")
+        shared.index_shares([(shares[0], [vector_id])])
+        self.assertEqual(shared.shares_index, {})
+
+        with TemporaryDirectory(prefix="i2o_test_docx_") as out_dir:
+            statuses = list(
+                self.to_docx.export_share(
+                    self.word_template,
+                    shares[1],
+                    [deepcopy(fixture_metadata_vector)],
+                    out_dir,
+                    workers=1,
+                )
+            )
+            self.assertEqual(statuses[0].get("status"), "done")
+            self.assertTrue(Path(statuses[0].get("path")).is_file())
+
+            # index passed to the batch export, down to worker processes
+            for workers in (1, 2):
+                statuses = list(
+                    self.to_docx.export_many(
+                        self.word_template,
+                        [deepcopy(fixture_metadata_vector)],
+                        Path(out_dir) / str(workers),
+                        workers=workers,
+                        shares_index=other_index,
+                    )
+                )
+                self.assertEqual(statuses[0].get("status"), "done")
+                document = Document(statuses[0].get("path"))
+                self.assertIn(
+                    self.to_docx.get_view_url(vector_id, shares[1]),
+                    "".join(
+                        rel.target_ref
+                        for rel in document.part.rels.values()
+                        if rel.is_external
+                    )
+                    + document.element.xml,
+                )
+
+    def test_export_many(self):
+        """Test batch export, serial and with a process pool."""
+        metadatas = [fixture_metadata_vector, fixture_metadata_resource]
+        for workers in (1, 2):
+            with TemporaryDirectory(prefix="i2o_test_docx_") as out_dir:
+                statuses = list(
+                    self.to_docx.export_many(
+                        template_path=self.word_template,
+                        metadatas=(deepcopy(md) for md in metadatas),
+                        out_dir=out_dir,
+                        workers=workers,
+                    )
+                )
+                self.assertEqual(len(statuses), 2)
+                for status in statuses:
+                    self.assertEqual(status.get("status"), "done")
+                    self.assertTrue(Path(status.get("path")).is_file())
+
+    def test_worker_exporter(self):
+        """Worker exporters created at first export, once by parameters."""
+        params = (
+            "a",
+            pickle.dumps({"lang": "EN", "max_fields": 1, "shares_index": {"x": "y"}}),
+        )
+        exporter = _get_worker_exporter(params)
+        self.assertEqual((exporter.lang, exporter.max_fields), ("EN", 1))
+        self.assertIs(_get_worker_exporter(params), exporter)
+        self.assertIsNot(_get_worker_exporter(("b", pickle.dumps({}))), exporter)
+
+    def test_export_many_incremental(self):
+        """Test incremental batch export: unchanged metadatas are skipped."""
+        with TemporaryDirectory(prefix="i2o_test_docx_") as out_dir:
+            manifest_path = Path(out_dir) / "manifest.sqlite"
+
+            def run(metadatas):
+                return {
+                    i.get("_id"): i.get("status")
+                    for i in self.to_docx.export_many(
+                        template_path=self.word_template,
+                        metadatas=(deepcopy(md) for md in metadatas),
+                        out_dir=out_dir,
+                        workers=1,
+                        manifest=manifest_path,
+                    )
+                }
+
+            metadatas = [fixture_metadata_vector, fixture_metadata_resource]
+            first = run(metadatas)
+            self.assertEqual(set(first.values()), {"done"})
+
+            # change one metadata
+            md_changed = deepcopy(fixture_metadata_resource)
+            md_changed["_modified"] = "2020-01-01T00:00:00.0000000+00:00"
+            second = run([fixture_metadata_vector, md_changed])
+            self.assertEqual(second.get(fixture_metadata_vector.get("_id")), "skipped")
+            self.assertEqual(second.get(md_changed.get("_id")), "done")
+
+    def test_export_many_incremental_target(self):
+        """Metadatas exported into another folder or with other options are exported
+        again."""
+        metadatas = [fixture_metadata_vector, fixture_metadata_resource]
+        with TemporaryDirectory(prefix="i2o_test_docx_") as tmp_dir:
+            manifest_path = Path(tmp_dir) / "manifest.sqlite"
+
+            def run(to_docx, out_dir):
+                return list(
+                    to_docx.export_many(
+                        template_path=self.word_template,
+                        metadatas=(deepcopy(md) for md in metadatas),
+                        out_dir=Path(tmp_dir) / out_dir,
+                        workers=1,
+                        manifest=manifest_path,
+                    )
+                )
+
+            run(self.to_docx, "a")
+            self.assertEqual(
+                {i.get("status") for i in run(self.to_docx, "a")}, {"skipped"}
+            )
+
+            # new output folder
+            statuses = run(self.to_docx, "b")
+            self.assertEqual({i.get("status") for i in statuses}, {"done"})
+            for status in statuses:
+                self.assertEqual(Path(status.get("path")).parent.name, "b")
+                self.assertTrue(Path(status.get("path")).is_file())
+
+            # other options
+            for to_docx in (Isogeo2docx(lang="EN"), Isogeo2docx(max_fields=1)):
+                self.assertEqual(
+                    {i.get("status") for i in run(to_docx, "b")}, {"done"}
+                )
+                self.assertEqual(
+                    {i.get("status") for i in run(to_docx, "b")}, {"skipped"}
+                )
+
 
 # #############################################################################
 # ##### Stand alone program ########
@@ -186,6 +186,38 @@ class TestFormatter(unittest.TestCase):
             self.assertIn("published", i)
 
 
+class TestCleanXml(unittest.TestCase):
+    """Test XML cleaner, without API access."""
+
+    @classmethod
+    def setUpClass(cls):
+        """Executed when module is loaded before any test."""
+        cls.fmt = Formatter()
+
+    def test_clean_xml(self):
+        """Special chars are escaped, valid tags are kept."""
+        self.assertEqual(self.fmt.clean_xml(None), "")
+        self.assertEqual(self.fmt.clean_xml(25000), 25000)
+        self.assertEqual(
+            self.fmt.clean_xml("Sans caractère spécial"), "Sans caractère spécial"
+        )
+        self.assertEqual(
+            self.fmt.clean_xml("<del>Supprimé</del> & 1 < 2 > 0"),
+            "<del>Supprimé</del> &amp; 1 &lt; 2 &gt; 0",
+        )
+        self.assertEqual(
+            self.fmt.clean_xml('<a href="http://foo.bar">Foo</a> <', mode="strict"),
+            "_Foo_ &lt;",
+        )
+
+    def test_clean_xml_batch(self):
+        """Batch cleaning returns the same as one by one."""
+        texts = [i.get("description") for i in fixture_limitations] + [None, "a & b"]
+        self.assertEqual(
+            self.fmt.clean_xml_batch(texts), [self.fmt.clean_xml(i) for i in texts]
+        )
+
+
 # ##############################################################################
 # ##### Stand alone program ########
 # ##################################
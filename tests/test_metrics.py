@@ -0,0 +1,104 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_metrics
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+# fixtures
+from .fixtures.fixture_metadatas import (
+    fixture_metadata_resource,
+    fixture_metadata_vector,
+)
+
+# target
+from isogeotodocx import ExportMetrics, Isogeo2docx
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestMetrics(unittest.TestCase):
+    """Test instrumentation of the export."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.tmp_dir = TemporaryDirectory(prefix="i2o_test_metrics_")
+        self.out_dir = Path(self.tmp_dir.name)
+        self.word_template = "tests/fixtures/template_Isogeo.docx"
+        self.metadatas = [fixture_metadata_vector, fixture_metadata_resource]
+
+    def tearDown(self):
+        """Executed after each test."""
+        self.tmp_dir.cleanup()
+
+    def export(self, to_docx: Isogeo2docx, workers: int) -> list:
+        return list(
+            to_docx.export_many(
+                template_path=self.word_template,
+                metadatas=(deepcopy(md) for md in self.metadatas),
+                out_dir=self.out_dir,
+                workers=workers,
+            )
+        )
+
+    def test_disabled(self):
+        """Without metrics, statuses are unchanged."""
+        for status in self.export(Isogeo2docx(), workers=1):
+            self.assertNotIn("timings", status)
+
+    def test_stages_timings(self):
+        """Stages are timed by record, in the current or in worker processes."""
+        for workers in (1, 2):
+            records = {}
+            metrics = ExportMetrics(
+                callback=lambda md_id, timings: records.update({md_id: timings})
+            )
+            statuses = self.export(Isogeo2docx(metrics=metrics), workers=workers)
+
+            self.assertEqual(len(records), 2)
+            self.assertEqual(metrics.records, 2)
+            for status in statuses:
+                self.assertEqual(status.get("timings"), records.get(status.get("_id")))
+            stages = set(records.get(fixture_metadata_vector.get("_id")))
+            self.assertTrue(
+                {"load", "context", "clean_xml", "dates", "render", "save"} <= stages
+            )
+
+            summary = metrics.summary()
+            self.assertEqual(summary.get("render").get("count"), 2)
+            self.assertEqual(sum(summary.get("render").get("histogram").values()), 2)
+
+    def test_profile(self):
+        """One record out of N is profiled."""
+        metrics = ExportMetrics(
+            profile_every=2, profile_dir=self.out_dir / "profiles", trace_memory=True
+        )
+        self.export(Isogeo2docx(metrics=metrics), workers=1)
+
+        self.assertEqual(len(list((self.out_dir / "profiles").glob("*.prof"))), 1)
+        self.assertEqual(
+            len(list((self.out_dir / "profiles").glob("*.tracemalloc"))), 1
+        )
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,135 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_render_cache
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+# fixtures
+from .fixtures.fixture_metadatas import fixture_metadata_vector
+
+# target
+from isogeotodocx import Isogeo2docx, RenderCache
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestRenderCache(unittest.TestCase):
+    """Test the content-addressed cache of rendered documents."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.tmp_dir = TemporaryDirectory(prefix="i2o_test_render_cache_")
+        self.tmp_path = Path(self.tmp_dir.name)
+        self.word_template = "tests/fixtures/template_Isogeo.docx"
+
+    def tearDown(self):
+        """Executed after each test."""
+        self.tmp_dir.cleanup()
+
+    def test_key(self):
+        """Keys ignore the export date, unless asked otherwise."""
+        context = {"varTitle": "Title", "varMdDtExp": "now"}
+        later = dict(context, varMdDtExp="later")
+
+        cache = RenderCache(self.tmp_path)
+        self.assertEqual(cache.key(context, "hash"), cache.key(later, "hash"))
+        self.assertNotEqual(cache.key(context, "hash"), cache.key(context, "other"))
+        self.assertNotEqual(
+            cache.key(context, "hash"), cache.key(dict(context, varTitle="T"), "hash")
+        )
+
+        cache = RenderCache(self.tmp_path, ignore_variables=())
+        self.assertNotEqual(cache.key(context, "hash"), cache.key(later, "hash"))
+
+    def test_export(self):
+        """Identical renderings are taken from the cache."""
+        to_docx = Isogeo2docx(render_cache=RenderCache(self.tmp_path / "cache"))
+        for out_dir in ("a", "b"):
+            (self.tmp_path / out_dir).mkdir()
+
+        first = to_docx.export(
+            self.word_template,
+            deepcopy(fixture_metadata_vector),
+            self.tmp_path / "a",
+            export_date="now",
+        )
+        self.assertEqual(first.get("status"), "done")
+        self.assertNotIn("cached", first)
+
+        second = to_docx.export(
+            self.word_template,
+            deepcopy(fixture_metadata_vector),
+            self.tmp_path / "b",
+            export_date="later",
+        )
+        self.assertEqual(second.get("status"), "done")
+        self.assertTrue(second.get("cached"))
+        self.assertEqual(
+            Path(second.get("path")).read_bytes(), Path(first.get("path")).read_bytes()
+        )
+
+        # new rendering of an exported document does not alter the cache
+        md = deepcopy(fixture_metadata_vector)
+        md["title"] = "Changed title"
+        cached = list((self.tmp_path / "cache").glob("*/*.docx"))
+        content = cached[0].read_bytes()
+        to_docx.export(self.word_template, md, self.tmp_path / "a")
+        self.assertEqual(cached[0].read_bytes(), content)
+
+    def test_shared_by_records(self):
+        """Metadatas with the same content share documents if their own variables
+        are ignored."""
+        copy = deepcopy(fixture_metadata_vector)
+        copy["_id"] = "f" * 32
+        copy["_created"] = "2020-01-01T10:00:00.0000000+00:00"
+        copy["_modified"] = "2020-01-02T10:00:00.0000000+00:00"
+        for out_dir in ("a", "b", "c"):
+            (self.tmp_path / out_dir).mkdir()
+
+        # by default, each metadata has its own document
+        to_docx = Isogeo2docx(render_cache=RenderCache(self.tmp_path / "cache"))
+        to_docx.export(
+            self.word_template, deepcopy(fixture_metadata_vector), self.tmp_path / "a"
+        )
+        status = to_docx.export(self.word_template, deepcopy(copy), self.tmp_path / "a")
+        self.assertNotIn("cached", status)
+
+        cache = RenderCache(
+            self.tmp_path / "shared",
+            ignore_variables=("varMdDtExp",) + RenderCache.RECORD_VARIABLES,
+        )
+        to_docx = Isogeo2docx(render_cache=cache)
+        first = to_docx.export(
+            self.word_template, deepcopy(fixture_metadata_vector), self.tmp_path / "b"
+        )
+        second = to_docx.export(self.word_template, copy, self.tmp_path / "c")
+        self.assertEqual(second.get("status"), "done")
+        self.assertTrue(second.get("cached"))
+        self.assertEqual(len(list((self.tmp_path / "shared").glob("*/*.docx"))), 1)
+        self.assertEqual(
+            Path(second.get("path")).read_bytes(), Path(first.get("path")).read_bytes()
+        )
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
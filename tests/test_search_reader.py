@@ -0,0 +1,102 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_search_reader
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import gzip
+import json
+from pathlib import Path
+from tempfile import TemporaryDirectory
+import unittest
+
+# fixtures
+from .fixtures.fixture_metadatas import (
+    fixture_metadata_resource,
+    fixture_metadata_vector,
+)
+
+# target
+from isogeotodocx import iter_search_results
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestSearchReader(unittest.TestCase):
+    """Test streaming of search dumps."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.tmp_dir = TemporaryDirectory(prefix="i2o_test_search_")
+        self.out_dir = Path(self.tmp_dir.name)
+        self.metadatas = [fixture_metadata_vector, fixture_metadata_resource] * 3
+        self.search = {
+            "envelope": None,
+            "limit": 6,
+            "offset": 0,
+            "query": {"_tags": []},
+            "results": self.metadatas,
+            "tags": {"keyword:isogeo:fixture": "fixture"},
+            "total": 6,
+        }
+
+    def tearDown(self):
+        """Executed after each test."""
+        self.tmp_dir.cleanup()
+
+    def test_search_response(self):
+        """Search response as dumped by fixturing, plain and gzipped."""
+        json_path = self.out_dir / "search.json"
+        with json_path.open("w", encoding="utf-8") as out_json:
+            json.dump(self.search, out_json, sort_keys=True, indent=2)
+        gz_path = self.out_dir / "search.json.gz"
+        with gzip.open(str(gz_path), "wt", encoding="utf-8") as out_gz:
+            json.dump(self.search, out_gz)
+
+        for in_path in (json_path, gz_path):
+            # small chunks to force refills inside metadatas
+            for chunk_size in (7, 65536):
+                self.assertEqual(
+                    list(iter_search_results(in_path, chunk_size=chunk_size)),
+                    self.metadatas,
+                )
+
+    def test_json_lines_and_list(self):
+        """JSON Lines and JSON list of metadatas."""
+        jsonl_path = self.out_dir / "search.jsonl"
+        with jsonl_path.open("w", encoding="utf-8") as out_jsonl:
+            for md in self.metadatas:
+                out_jsonl.write(json.dumps(md) + "\n")
+        list_path = self.out_dir / "results.json"
+        with list_path.open("w", encoding="utf-8") as out_json:
+            json.dump(self.metadatas, out_json)
+
+        for in_path in (jsonl_path, list_path):
+            self.assertEqual(
+                list(iter_search_results(in_path, chunk_size=11)), self.metadatas
+            )
+
+    def test_empty_results(self):
+        """Search without results."""
+        json_path = self.out_dir / "empty.json"
+        json_path.write_text(json.dumps({"results": [], "total": 0}))
+        self.assertEqual(list(iter_search_results(json_path)), [])
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
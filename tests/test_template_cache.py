@@ -0,0 +1,325 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_template_cache
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+from io import BytesIO
+from pathlib import Path
+import re
+import shutil
+from tempfile import TemporaryDirectory
+import unittest
+from unittest.mock import patch
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile
+import zlib
+
+# 3rd party
+from docx import Document
+from docxtpl import DocxTemplate
+from isogeo_pysdk import Metadata
+
+# fixtures
+from .fixtures.fixture_metadatas import fixture_metadata_vector
+
+# target
+from isogeotodocx import Isogeo2docx, TemplateCache, precompile_template
+from isogeotodocx.utils import docx_writer, save_docx
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestTemplateCache(unittest.TestCase):
+    """Test the parsed template cache."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.word_template = Path("tests/fixtures/template_Isogeo.docx")
+        self.context = {
+            "varTitle": "Titre & <sous-titre>",
+            "varKeywords": "test ; fixture",
+            "varContactsDetails": [{"name": "Isogeo", "role": "Auteur"}],
+        }
+
+    def test_render_same_as_docxtpl(self):
+        """Cached rendering must produce the same document as docxtpl."""
+        tpl_ref = DocxTemplate(str(self.word_template))
+        tpl_ref.render(self.context, autoescape=True)
+
+        cache = TemplateCache(self.word_template)
+        tpl = cache.new_template()
+        tpl.render(self.context, autoescape=True)
+
+        self.assertEqual(tpl.get_xml(), tpl_ref.get_xml())
+
+    def test_copies_are_independent(self):
+        """Rendering a copy must not alter the cached document."""
+        cache = TemplateCache(self.word_template)
+        pristine_xml = cache.pristine.get_xml()
+
+        tpl_a = cache.new_template()
+        tpl_a.render(self.context, autoescape=True)
+        tpl_b = cache.new_template()
+
+        self.assertEqual(cache.pristine.get_xml(), pristine_xml)
+        self.assertEqual(tpl_b.get_xml(), pristine_xml)
+        self.assertNotEqual(tpl_a.get_xml(), pristine_xml)
+
+    def test_exporter_template(self):
+        """Exporter parses the template once and templates can be saved."""
+        to_docx = Isogeo2docx()
+        tpl_a = to_docx.get_template(self.word_template)
+        tpl_b = to_docx.get_template(self.word_template)
+        self.assertEqual(len(to_docx.templates), 1)
+        self.assertIsNot(tpl_a.docx, tpl_b.docx)
+
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        to_docx.md2docx(tpl_a, md)
+        out = BytesIO()
+        tpl_a.save(out)
+        with ZipFile(out) as docx_out:
+            self.assertIsNone(docx_out.testzip())
+            self.assertIn("Isogeo fixture", docx_out.read("word/document.xml").decode())
+
+    def test_compact_rows(self):
+        """Table rows rendered without Jinja: same document, without editing marks."""
+        to_docx = Isogeo2docx()
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        md.featureAttributes *= 50
+        context = to_docx.build_context(md, export_date="now")
+        self.assertEqual(len(context.get("varFields")), len(md.featureAttributes))
+
+        cache = TemplateCache(self.word_template, use_artifact=False)
+        self.assertIn("varFields", [source for _, source, _, _ in cache.rows])
+        self.assertIn("varFields", cache.variables())
+        self.assertNotIn("_rows_0", cache.variables())
+
+        marks = re.compile(r' w:rsid\w*="[^"]*"|<w:proofErr [^>]*/>')
+        for autoescape in (False, True):
+            tpl_ref = DocxTemplate(str(self.word_template))
+            tpl_ref.render(context, autoescape=autoescape)
+            tpl = cache.new_template()
+            tpl.render(context, autoescape=autoescape)
+            self.assertEqual(
+                marks.sub("", tpl.get_xml()), marks.sub("", tpl_ref.get_xml())
+            )
+
+        # capped attributes table
+        to_docx = Isogeo2docx(max_fields=10)
+        context = to_docx.build_context(md, export_date="now")
+        self.assertEqual(len(context.get("varFields")), 10)
+        self.assertEqual(context.get("varFieldsCount"), len(md.featureAttributes))
+
+    def test_slim_template(self):
+        """Untouched parts copied as compressed once; embedded fonts dropped."""
+        cache = TemplateCache(self.word_template)
+        tpl = cache.new_template()
+        tpl.render(self.context)
+        out = BytesIO()
+        tpl.save(out)
+        with ZipFile(str(self.word_template)) as docx_in, ZipFile(out) as docx_out:
+            self.assertIsNone(docx_out.testzip())
+            # copied from the template without being compressed again
+            for name in ("word/fonts/font1.odttf", "word/media/image1.png"):
+                member_in, member_out = docx_in.getinfo(name), docx_out.getinfo(name)
+                self.assertEqual(member_out.CRC, member_in.CRC)
+                self.assertEqual(member_out.compress_type, member_in.compress_type)
+                self.assertEqual(member_out.compress_size, member_in.compress_size)
+            # XML parts left untouched by rendering
+            self.assertEqual(
+                docx_out.read("word/styles.xml"),
+                cache.precompressed().get("/word/styles.xml").blob,
+            )
+
+        cache = TemplateCache(self.word_template, embed_fonts=False)
+        tpl = cache.new_template()
+        tpl.render(self.context)
+        slim = BytesIO()
+        tpl.save(slim)
+        self.assertLess(len(slim.getvalue()), len(out.getvalue()) / 10)
+        with ZipFile(slim) as docx_out:
+            self.assertIsNone(docx_out.testzip())
+            self.assertFalse([i for i in docx_out.namelist() if "fonts/" in i])
+            self.assertNotIn(b"embedTrueTypeFonts", docx_out.read("word/settings.xml"))
+            self.assertNotIn(b"w:embedRegular", docx_out.read("word/fontTable.xml"))
+            self.assertIn("word/media/image1.png", docx_out.namelist())
+        Document(slim)
+
+    def test_save_fallback(self):
+        """Documents saved without zipfile and python-docx internals."""
+        cache = TemplateCache(self.word_template)
+        tpl = cache.new_template()
+        tpl.render(self.context)
+        expected = BytesIO()
+        tpl.save(expected)
+
+        with patch.object(
+            docx_writer, "_zipfile_internals", ("_no_such_internal",)
+        ), patch.object(docx_writer, "_ContentTypesItem", None):
+            tpl = cache.new_template()
+            tpl.render(self.context)
+            out = BytesIO()
+            tpl.save(out)
+
+        with ZipFile(expected) as docx_expected, ZipFile(out) as docx_out:
+            self.assertIsNone(docx_out.testzip())
+            self.assertEqual(
+                sorted(docx_out.namelist()), sorted(docx_expected.namelist())
+            )
+            for name in ("word/media/image1.png", "word/styles.xml"):
+                self.assertEqual(docx_out.read(name), docx_expected.read(name))
+            self.assertIn(b"<Override", docx_out.read("[Content_Types].xml"))
+        self.assertEqual(
+            [i.text for i in Document(out).paragraphs],
+            [i.text for i in Document(expected).paragraphs],
+        )
+
+    def test_read_raw_member(self):
+        """Template members copied as stored, or compressed again if unreadable."""
+        with open(str(self.word_template), "rb") as in_zip, ZipFile(in_zip) as zip_in:
+            for zinfo in zip_in.infolist():
+                data = docx_writer.read_raw_member(in_zip, zinfo)
+                self.assertEqual(len(data), zinfo.compress_size)
+                if zinfo.compress_type == ZIP_STORED:
+                    self.assertEqual(data, zip_in.read(zinfo))
+            # no local header at this offset
+            zinfo.header_offset += 1
+            with self.assertRaises(ValueError):
+                docx_writer.read_raw_member(in_zip, zinfo)
+
+        package = DocxTemplate(str(self.word_template)).docx.part.package
+        with patch.object(docx_writer, "_local_header_signature", b"none"):
+            members = docx_writer.precompress_parts(package, self.word_template)
+        image = members.get("/word/media/image1.png")
+        self.assertEqual(image.compress_type, ZIP_DEFLATED)
+        self.assertEqual(zlib.decompress(image.data, -zlib.MAX_WBITS), image.blob)
+
+    def test_replace_media(self):
+        """Replaced media saved with the requested compression."""
+        with ZipFile(str(self.word_template)) as docx_in:
+            image = docx_in.read("word/media/image1.png")
+        new_image = image[::-1]
+
+        for compress, compression in ((True, ZIP_DEFLATED), (False, ZIP_STORED)):
+            tpl = TemplateCache(self.word_template).new_template()
+            tpl.render(self.context)
+            tpl.replace_media(BytesIO(image), BytesIO(new_image))
+            out = BytesIO()
+            save_docx(tpl, out, compress=compress)
+            with ZipFile(out) as docx_out:
+                self.assertIsNone(docx_out.testzip())
+                self.assertEqual(docx_out.read("word/media/image1.png"), new_image)
+                self.assertEqual(
+                    docx_out.getinfo("word/media/image1.png").compress_type,
+                    compression,
+                )
+                if not compress:
+                    self.assertEqual(
+                        {i.compress_type for i in docx_out.infolist()}, {ZIP_STORED}
+                    )
+
+    def test_slim_unknown_image(self):
+        """Template images in formats unknown to Pillow are kept as is."""
+        with TemporaryDirectory(prefix="i2o_test_tpl_") as tmp_dir:
+            template_path = Path(tmp_dir) / self.word_template.name
+            with ZipFile(str(self.word_template)) as docx_in, ZipFile(
+                str(template_path), "w"
+            ) as docx_out:
+                for member in docx_in.infolist():
+                    data = docx_in.read(member)
+                    if member.filename == "word/media/image1.png":
+                        # EMF-like content, not readable as an image
+                        data = b"\x01\x00\x00\x00" + bytes(range(256)) * 8
+                    docx_out.writestr(member, data)
+
+            with self.assertLogs("isogeotodocx", "WARNING"):
+                cache = TemplateCache(template_path, max_image_width=64)
+            image = [
+                part
+                for part in cache.pristine.docx.part.package.iter_parts()
+                if part.partname == "/word/media/image1.png"
+            ][0]
+            self.assertEqual(image.blob, b"\x01\x00\x00\x00" + bytes(range(256)) * 8)
+            tpl = cache.new_template()
+            tpl.render(self.context)
+            tpl.save(BytesIO())
+
+    def test_precompiled_artifact(self):
+        """Template loaded from its artifact renders the same document."""
+        with TemporaryDirectory(prefix="i2o_test_tpl_") as tmp_dir:
+            template_path = Path(tmp_dir) / self.word_template.name
+            shutil.copy(str(self.word_template), str(template_path))
+
+            # variables check
+            with self.assertRaises(ValueError):
+                Isogeo2docx().precompile_template(template_path, strict=True)
+            # exporter variable missing from the template
+            with self.assertLogs("isogeotodocx", "WARNING") as logs:
+                precompile_template(
+                    template_path,
+                    known_variables=TemplateCache(template_path).variables()
+                    | {"varDropped"},
+                    strict=True,
+                )
+            self.assertIn("varDropped", "".join(logs.output))
+            artifact_path = precompile_template(
+                template_path, known_variables=self.context
+            )
+            self.assertTrue(artifact_path.is_file())
+            self.assertIn(
+                TemplateCache(template_path).template_hash[:16], artifact_path.name
+            )
+
+            tpl_ref = TemplateCache(template_path).new_template()
+            tpl_ref.render(self.context, autoescape=True)
+            # loaded on demand only
+            self.assertFalse(TemplateCache(template_path)._codes)
+            self.assertFalse(
+                Isogeo2docx().get_template_cache(template_path)._codes
+            )
+            self.assertTrue(
+                Isogeo2docx(use_artifacts=True).get_template_cache(template_path)._codes
+            )
+            cache = TemplateCache(template_path, use_artifact=True)
+            self.assertTrue(cache._codes)
+            tpl = cache.new_template()
+            tpl.render(self.context, autoescape=True)
+            self.assertEqual(tpl.get_xml(), tpl_ref.get_xml())
+
+            # artifact of another version is ignored, before reading its content
+            with artifact_path.open("rb") as in_artifact:
+                artifact = in_artifact.read()
+            magic, header, content = artifact.split(b"\n", 2)
+            header = header.replace(b'"versions": [', b'"versions": [0, ')
+            with artifact_path.open("wb") as out_artifact:
+                out_artifact.write(b"\n".join((magic, header, b"not marshalled")))
+            cache = TemplateCache(template_path, use_artifact=True)
+            self.assertFalse(cache._codes)
+
+            # not an artifact
+            with artifact_path.open("wb") as out_artifact:
+                out_artifact.write(b"not an artifact")
+            cache = TemplateCache(template_path, use_artifact=True)
+            self.assertFalse(cache._codes)
+            tpl = cache.new_template()
+            tpl.render(self.context, autoescape=True)
+            self.assertEqual(tpl.get_xml(), tpl_ref.get_xml())
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
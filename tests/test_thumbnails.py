@@ -0,0 +1,94 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_thumbnails
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+from copy import deepcopy
+from io import BytesIO
+from pathlib import Path
+import unittest
+from zipfile import ZipFile
+
+# 3rd party
+from docx.image.image import Image as DocxImage
+from isogeo_pysdk import Metadata
+
+# fixtures
+from .fixtures.fixture_metadatas import fixture_metadata_vector
+
+# target
+from isogeotodocx import Isogeo2docx, ThumbnailCache
+from isogeotodocx.utils import thumbnails
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestThumbnails(unittest.TestCase):
+    """Test thumbnails processing and insertion."""
+
+    def setUp(self):
+        """Executed before each test."""
+        self.img_jpg = str(
+            Path("tests/fixtures/img/map_vendee_touristique_912x652.jpg").resolve()
+        )
+        self.img_png = str(
+            Path("tests/fixtures/img/map_caen_michelin_550x382.png").resolve()
+        )
+        self.word_template = Path("tests/fixtures/template_Isogeo.docx")
+
+    def test_read_once(self):
+        """Without options, images are kept as is and read only once."""
+        cache = ThumbnailCache()
+        blob, width = cache.get(self.img_jpg)
+        self.assertEqual(blob, Path(self.img_jpg).read_bytes())
+        self.assertEqual(width, DocxImage.from_blob(blob).width)
+        self.assertIs(cache.get(self.img_jpg)[0], blob)
+
+    @unittest.skipIf(thumbnails.Image is None, "Pillow is not installed")
+    def test_downsize(self):
+        """Large images are downsized, keeping their display size."""
+        cache = ThumbnailCache(max_width=400)
+        for img_path in (self.img_jpg, self.img_png):
+            blob, width = cache.get(img_path)
+            original = Path(img_path).read_bytes()
+            self.assertLessEqual(len(blob), len(original))
+            self.assertEqual(width, DocxImage.from_blob(original).width)
+        # JPEG is downsized
+        blob, width = cache.get(self.img_jpg)
+        self.assertEqual(DocxImage.from_blob(blob).px_width, 400)
+
+    def test_thumbnails_table(self):
+        """Thumbnails table is checked once and images are inserted."""
+        md = Metadata.clean_attributes(deepcopy(fixture_metadata_vector))
+        to_docx = Isogeo2docx(
+            thumbnails={md._id: self.img_png, "missing": "tests/fixtures/nope.png"}
+        )
+        self.assertEqual(to_docx.thumbnails, {md._id: self.img_png})
+
+        tpl = to_docx.get_template(self.word_template)
+        self.assertTrue(to_docx.md2docx(tpl, md))
+        out = BytesIO()
+        tpl.save(out)
+        with ZipFile(out) as docx_out:
+            media = [i for i in docx_out.namelist() if i.startswith("word/media/")]
+        self.assertEqual(len(media), 2)  # template logo + thumbnail
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()
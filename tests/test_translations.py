@@ -0,0 +1,62 @@
+# -*- coding: UTF-8 -*-
+#! python3
+
+"""
+    Usage from the repo root folder:
+
+    ```python
+    python -m unittest tests.test_translations
+    ```
+"""
+
+# #############################################################################
+# ########## Libraries #############
+# ##################################
+
+# Standard library
+import unittest
+
+# 3rd party
+from isogeo_pysdk import IsogeoTranslator
+
+# target
+from isogeotodocx import Formatter, Isogeo2docx, get_translation_table
+
+# #############################################################################
+# ########## Classes ###############
+# ##################################
+
+
+class TestTranslations(unittest.TestCase):
+    """Test shared translation tables."""
+
+    def test_same_as_sdk(self):
+        """Translations match the SDK translator."""
+        for lang in ("FR", "EN", "fr", "de"):
+            translator = IsogeoTranslator(lang)
+            table = get_translation_table(lang)
+            for subdomain, strings in translator.translations.items():
+                for string in list(strings) + ["unknown", None]:
+                    self.assertEqual(
+                        table.tr(subdomain, string), translator.tr(subdomain, string)
+                    )
+            with self.assertRaises(ValueError):
+                table.tr("unknown", "unknown")
+
+    def test_shared(self):
+        """Tables are built once by language and read-only."""
+        table = get_translation_table("en")
+        self.assertIs(table, get_translation_table("EN"))
+        self.assertIs(Isogeo2docx(lang="EN").isogeo_tr.__self__, table)
+        self.assertIs(Formatter(lang="EN").isogeo_tr.__self__, table)
+        self.assertIsNot(table, get_translation_table("FR"))
+
+        with self.assertRaises(TypeError):
+            table.table[("roles", "author")] = "Writer"
+
+
+# #############################################################################
+# ##### Stand alone program ########
+# ##################################
+if __name__ == "__main__":
+    unittest.main()